@@ -0,0 +1,67 @@
+"""
+Benchmark: dataset-wide needs_attention matrix vs. the per-cell Python check.
+
+    python benchmarks/bench_attention_mask.py --rows 20000 --cols 300
+
+The per-cell loop is timed on --legacy-rows rows and extrapolated; both are
+compared on that slice.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.attention import build_attention, ranked_records, unpack  # noqa: E402
+from utils.detection import contains_persoarabic  # noqa: E402
+
+WORDS = ["کابل", "yes", "no", "12", " ", "N/A", " null ", "-", "--", "ok", "other"]
+
+
+def legacy_needs_attention(old_val):
+    v = "" if old_val is None else str(old_val).strip()
+    if not v:
+        return True
+    if v.strip().lower() in ["n/a", "na", "null", "none", "nan", "-", "--"]:
+        return True
+    return contains_persoarabic(v)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--cols", type=int, default=300)
+    ap.add_argument("--legacy-rows", type=int, default=2_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        rng.choice(np.array(WORDS, dtype=object), (args.rows, args.cols)),
+        columns=[f"q{i}" for i in range(args.cols)],
+    )
+    df.insert(0, "_uuid", [f"uuid-{i:07d}" for i in range(args.rows)])
+
+    sample = df.iloc[:args.legacy_rows, 1:]
+    t0 = time.perf_counter()
+    old = sample.map(legacy_needs_attention).to_numpy(dtype=bool)
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    att = build_attention(df)
+    ranked = ranked_records(att)
+    t_new = time.perf_counter() - t0
+    assert (unpack(att)[:args.legacy_rows] == old).all(), "attention matrix differs from the per-cell check"
+
+    est_legacy = t_legacy / len(sample) * len(df)
+    print(f"rows={args.rows:,} cols={args.cols} flagged records={len(ranked):,} bitmap={att['bits'].nbytes:,} bytes")
+    print(f"matrix : {t_new:.2f}s")
+    print(f"legacy : ~{est_legacy:.1f}s (extrapolated from {len(sample):,} rows)")
+    print(f"speedup: ~{est_legacy / t_new:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
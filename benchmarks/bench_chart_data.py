@@ -0,0 +1,53 @@
+"""
+Benchmark: server-side chart reduction (LTTB, histogram bins, 2-D grid, box stats).
+
+    python benchmarks/bench_chart_data.py --rows 200000 --budget 5000
+
+Prints the time for each reduction and how many values would reach the
+browser, compared with sending every row.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.chart_data import box_stats, downsample_line, histogram_2d, histogram_bins, sample_rows  # noqa: E402
+
+
+def timed(label, fn, size):
+    t0 = time.perf_counter()
+    out = fn()
+    print(f"{label:<14} {time.perf_counter() - t0:6.3f}s  values sent: {size(out):,}")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--budget", type=int, default=5_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "x": np.cumsum(rng.normal(size=args.rows)),
+        "y": rng.gamma(2.0, 3.0, args.rows),
+        "g": rng.choice(["a", "b", "c", "d"], args.rows),
+    })
+    df.loc[rng.choice(args.rows, args.rows // 50, replace=False), "y"] = np.nan
+    print(f"rows={args.rows:,} (unreduced: {2 * args.rows:,} values per x/y chart)")
+
+    timed("scatter sample", lambda: sample_rows(df, args.budget), lambda d: d.shape[0] * 2)
+    timed("line (LTTB)", lambda: downsample_line(df.reset_index(), "index", "x", args.budget), lambda d: d.shape[0] * 2)
+    bins = timed("histogram", lambda: histogram_bins(df["y"]), lambda d: d.shape[0] * 2)
+    assert bins["count"].sum() == df["y"].notna().sum()
+    timed("2-D grid", lambda: histogram_2d(df["x"], df["y"]), lambda t: t[2].size)
+    timed("box stats", lambda: box_stats(df["y"], df["g"]), lambda d: d.size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: sampled, memoized column type inference vs. full-column parsing.
+
+    python benchmarks/bench_column_types.py --rows 20000 --cols 60
+
+Both must return the same type for every column.
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.column_types import infer_types  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+
+def legacy_detect_column_type(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "date"
+    s = series.dropna()
+    if s.empty:
+        return "unknown"
+    s = s.astype(str)
+    try:
+        parsed = pd.to_datetime(s, errors="coerce")
+        if parsed.notna().mean() >= 0.7:
+            return "date"
+    except Exception:
+        pass
+    num = pd.to_numeric(s.str.replace(",", "", regex=False), errors="coerce")
+    if num.notna().mean() >= 0.7:
+        return "numeric"
+    if s.nunique() / len(s) <= 0.3:
+        return "categorical"
+    return "text"
+
+
+def make_frame(rows, cols, rng):
+    out = {}
+    for i in range(cols):
+        kind = i % 6
+        if kind == 0:
+            out[f"date_{i}"] = pd.date_range("2024-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M")
+        elif kind == 1:
+            out[f"num_{i}"] = rng.integers(0, 100_000, rows).astype(str)
+        elif kind == 2:
+            out[f"cat_{i}"] = rng.choice(["yes", "no", "maybe"], rows)
+        elif kind == 3:
+            out[f"text_{i}"] = [f"text {x}" for x in rng.integers(0, 10 ** 9, rows)]
+        elif kind == 4:
+            v = rng.integers(0, 1000, rows).astype(str).astype(object)
+            v[rng.random(rows) < 0.3] = "x"   # close to the 0.7 threshold -> escalates
+            out[f"mixed_{i}"] = v
+        else:
+            out[f"thousands_{i}"] = [f"{x:,}" for x in rng.integers(0, 10 ** 7, rows)]
+    return pd.DataFrame(out)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--cols", type=int, default=60)
+    args = ap.parse_args()
+
+    df = make_frame(args.rows, args.cols, np.random.default_rng(0))
+
+    t0 = time.perf_counter()
+    old = {c: legacy_detect_column_type(df[c]) for c in df.columns}
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new = infer_types(df)
+    t_new = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    infer_types(df)
+    t_memo = time.perf_counter() - t0
+
+    assert old == new, {c: (old[c], new[c]) for c in df.columns if old[c] != new[c]}
+    print(f"rows={args.rows:,} cols={args.cols}")
+    print(f"legacy full parse : {t_legacy:.2f}s")
+    print(f"sampled           : {t_new:.2f}s")
+    print(f"memoized (hashes) : {t_memo:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: hash-indexed Correction_Log dedup vs. the old iterrows key set.
+
+    python benchmarks/bench_correction_dedup.py --log-rows 200000 --records 20000
+
+Runs on the local CSV backend: the first "Add" builds the key index from a
+full read, the second one only fetches the rows appended in between.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.dedup as dedup  # noqa: E402
+from utils.dedup import KEY_COLS, new_records, sync_hash_index  # noqa: E402
+from utils.local_backend import LocalSpreadsheet  # noqa: E402
+
+
+def legacy_new_rows(existing, records):
+    corr_df = pd.DataFrame(existing[1:], columns=existing[0])
+    existing_keys = {
+        f"{r['_uuid']}|{r['Question']}|{r['old_value']}"
+        for _, r in corr_df.iterrows()
+    }
+    rows_to_append = []
+    for rec in records:
+        key = f"{rec['_uuid']}|{rec['Question']}|{rec['old_value']}"
+        if key not in existing_keys:
+            rows_to_append.append([rec["_uuid"], rec["Question"], rec["old_value"]])
+            existing_keys.add(key)
+    rows_to_append.sort(key=lambda x: x[1])
+    return rows_to_append
+
+
+def fake_records(rng, n, start):
+    return pd.DataFrame({
+        "_uuid": [f"uuid-{i:07d}" for i in rng.integers(start, start + n, n)],
+        "Question": [f"q{i}" for i in rng.integers(0, 50, n)],
+        "old_value": rng.choice(np.array(["کابل", "هرات", "بلی", "نه"], dtype=object), n),
+    })
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--log-rows", type=int, default=200_000)
+    ap.add_argument("--records", type=int, default=20_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    log = fake_records(rng, args.log_rows, 0).drop_duplicates()
+    # half of the detected records are already in the log
+    records = pd.concat([
+        log.sample(args.records // 2, random_state=0),
+        fake_records(rng, args.records - args.records // 2, args.log_rows),
+    ], ignore_index=True)
+
+    with tempfile.TemporaryDirectory() as folder:
+        dedup.INDEX_DIR = os.path.join(folder, "_index")
+        sh = LocalSpreadsheet(os.path.join(folder, "sheets"))
+        ws = sh.add_worksheet("Correction_Log")
+        ws.update("A1", [KEY_COLS] + log.values.tolist())
+
+        t0 = time.perf_counter()
+        old = legacy_new_rows(ws.get_all_values(), records.to_dict("records"))
+        t_legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = sync_hash_index(ws)
+        to_add = new_records(records, index["hashes"]).sort_values("Question", kind="stable")
+        t_first = time.perf_counter() - t0
+        assert to_add[KEY_COLS].values.tolist() == old, "dedup output differs from the legacy loop"
+
+        ws.update(f"A{index['rows'] + 2}", to_add[KEY_COLS].values.tolist())
+        sync_hash_index(ws)
+
+        more = fake_records(rng, args.records, args.log_rows * 2)
+        t0 = time.perf_counter()
+        index = sync_hash_index(ws)
+        again = new_records(pd.concat([records, more], ignore_index=True), index["hashes"])
+        t_next = time.perf_counter() - t0
+        assert len(again) == len(more.drop_duplicates())
+
+    print(f"log rows={len(log):,} records={len(records):,} new={len(old):,}")
+    print(f"legacy iterrows      : {t_legacy:.2f}s")
+    print(f"hash index (cold)    : {t_first:.2f}s")
+    print(f"hash index (warm)    : {t_next:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
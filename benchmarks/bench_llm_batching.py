@@ -0,0 +1,71 @@
+"""
+Benchmark: one chat completion per value vs. token-budgeted multi-segment batches.
+
+    python benchmarks/bench_llm_batching.py --values 400 --latency 0.3 --per-segment 0.01
+
+Both runs go through the app's runner (utils.async_llm.translate_concurrent) against
+the local mock API (benchmarks/mock_openai_server.py), at the same concurrency:
+per value is the runner with max_segments=1, batched uses the default budget.
+--drop-rate of multi-segment replies lose their last segment (exercising the
+bisection retry). Prompt tokens use the same estimate as the batcher.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import AsyncOpenAI  # noqa: E402
+
+from mock_openai_server import WORDS, start  # noqa: E402
+from utils.async_llm import translate_concurrent  # noqa: E402
+from utils.llm_translate import MAX_SEGMENTS, SYSTEM_PROMPT, estimate_tokens  # noqa: E402
+
+
+def run(server, counters, values, args, max_segments):
+    base_url = f"http://{args.host}:{server.server_address[1]}/v1"
+    requests, tokens = counters["requests"], counters["prompt_tokens"]
+    t0 = time.perf_counter()
+    out, info = translate_concurrent(
+        lambda: AsyncOpenAI(api_key="mock", base_url=base_url, max_retries=0),
+        "mock-model", values, max_segments=max_segments, concurrency=args.concurrency, timeout=args.timeout,
+    )
+    elapsed = time.perf_counter() - t0
+    assert out == [f"EN {v}" for v in values], f"{info['failed']} values not translated"
+    return elapsed, counters["requests"] - requests, counters["prompt_tokens"] - tokens, info
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--values", type=int, default=400)
+    ap.add_argument("--latency", type=float, default=0.3, help="seconds per request")
+    ap.add_argument("--per-segment", type=float, default=0.01, help="extra seconds per segment")
+    ap.add_argument("--drop-rate", type=float, default=0.1)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rpm", type=int, default=100_000, help="mock rate limit (high: measure batching only)")
+    ap.add_argument("--timeout", type=float, default=10.0)
+    args = ap.parse_args()
+    args.host, args.port, args.stall_rate, args.stall = "127.0.0.1", 0, 0.0, 0.0
+
+    random.seed(0)
+    values = [" ".join(random.choices(WORDS, k=random.randint(1, 6))) + f" {i}" for i in range(args.values)]
+
+    server, counters = start(args)
+    try:
+        single = run(server, counters, values, args, max_segments=1)
+        batched = run(server, counters, values, args, max_segments=MAX_SEGMENTS)
+    finally:
+        server.shutdown()
+
+    print(f"values={len(values):,} system prompt={estimate_tokens(SYSTEM_PROMPT)} tokens "
+          f"concurrency={args.concurrency}")
+    for label, (elapsed, requests, tokens, info) in (("per value", single), ("batched  ", batched)):
+        print(f"{label}: {requests:,} requests ({info['bisections']} split retries), {elapsed:.1f}s, "
+              f"~{tokens:,} prompt tokens, {len(values) / elapsed * 60:,.0f} values/min")
+    assert batched[0] < single[0], "batching should beat one request per value"
+
+
+if __name__ == "__main__":
+    main()
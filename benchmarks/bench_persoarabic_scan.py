@@ -0,0 +1,104 @@
+"""
+Benchmark: column-wise Dari/Pashto scanner vs. the old iterrows x columns loop.
+
+    python benchmarks/bench_persoarabic_scan.py --rows 20000 --cols 300
+
+The old loop is timed on --legacy-rows rows and extrapolated; outputs are
+compared on that slice. The incremental scan is timed after --new-rows rows
+are appended and --edited-rows rows are modified.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.detection import scan_persoarabic, scan_persoarabic_incremental  # noqa: E402
+
+WORDS = ["کابل", "هرات", "yes", "no", "12", "", "بلی", "n/a", "other", "3.5"]
+
+
+def legacy_contains(text):
+    if text is None:
+        return False
+    return bool(re.search(r'[\u0600-\u06FF]+', str(text)))
+
+
+def legacy_scan(df_data, uuid_col):
+    records = []
+    for _, row in df_data.iterrows():
+        row_uuid = str(row.get(uuid_col, "")).strip()
+        if not row_uuid:
+            continue
+        for col in df_data.columns:
+            if col == uuid_col:
+                continue
+            val = row[col]
+            if legacy_contains(val):
+                records.append({"_uuid": row_uuid, "Question": col, "old_value": val})
+    return records
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--cols", type=int, default=300)
+    ap.add_argument("--legacy-rows", type=int, default=1_000)
+    ap.add_argument("--new-rows", type=int, default=300)
+    ap.add_argument("--edited-rows", type=int, default=50)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        rng.choice(np.array(WORDS, dtype=object), (args.rows, args.cols)),
+        columns=[f"q{i}" for i in range(args.cols)],
+    )
+    df.insert(0, "_uuid", [f"uuid-{i:07d}" for i in range(args.rows)])
+    df.loc[::97, "_uuid"] = ""
+
+    sample = df.head(args.legacy_rows)
+    t0 = time.perf_counter()
+    old = legacy_scan(sample, "_uuid")
+    t_legacy = time.perf_counter() - t0
+    new = scan_persoarabic(sample, "_uuid").to_dict("records")
+    assert old == new, "scanner output differs from the legacy loop"
+
+    t0 = time.perf_counter()
+    full = scan_persoarabic(df, "_uuid")
+    t_new = time.perf_counter() - t0
+
+    est_legacy = t_legacy / len(sample) * len(df)
+    print(f"rows={args.rows:,} cols={args.cols} detected={len(full):,}")
+    print(f"scanner: {t_new:.2f}s")
+    print(f"legacy : ~{est_legacy:.1f}s (extrapolated from {len(sample):,} rows)")
+    print(f"speedup: ~{est_legacy / t_new:.0f}x")
+
+    # ---- incremental: yesterday's state + today's intake ----
+    _, state, _ = scan_persoarabic_incremental(df, "_uuid")
+    today = pd.concat([df, df.tail(args.new_rows).assign(_uuid=lambda d: d["_uuid"] + "-new")], ignore_index=True)
+    edited = rng.choice(len(df), args.edited_rows, replace=False)
+    today.iloc[edited, 1] = "کابل"
+    # as load_df delivers it: a freshly built frame, not an edited copy
+    today = pd.DataFrame(today.to_numpy(dtype=object).tolist(), columns=today.columns)
+
+    t0 = time.perf_counter()
+    full_today = scan_persoarabic(today, "_uuid")
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    inc, _, scanned = scan_persoarabic_incremental(today, "_uuid", state)
+    t_inc = time.perf_counter() - t0
+    assert inc.values.tolist() == full_today.values.tolist()
+    print(
+        f"incremental: {t_inc:.2f}s vs full {t_full:.2f}s "
+        f"({scanned:,} of {len(today):,} rows scanned after +{args.new_rows} / ~{args.edited_rows} edited)"
+    )
+    assert t_inc < t_full, "incremental scan should beat a full scan on a small delta"
+
+
+if __name__ == "__main__":
+    main()
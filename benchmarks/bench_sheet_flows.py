@@ -0,0 +1,99 @@
+"""
+Offline benchmark of the Sheets-backed flows on the local CSV backend.
+
+    python benchmarks/bench_sheet_flows.py --rows 50000 --cols 60 --latency 0.3
+
+--latency adds a fixed delay per simulated API call, --quota-error-rate makes
+that fraction of calls fail with a 429 APIError.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gspread.exceptions import APIError  # noqa: E402
+
+from utils.corrections import apply_corrections  # noqa: E402
+from utils.local_backend import LocalSpreadsheet  # noqa: E402
+import utils.sheet_writes as sheet_writes  # noqa: E402
+from utils.sheet_writes import (  # noqa: E402
+    append_rows_resumable, with_backoff, write_changed_cells, write_full_sheet_chunked,
+)
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    try:
+        out = fn()
+    except APIError as e:
+        print(f"{label:<28} FAILED  {e}")
+        return None
+    print(f"{label:<28} {time.perf_counter() - t0:7.2f}s")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--cols", type=int, default=60)
+    ap.add_argument("--corrections", type=int, default=2_000)
+    ap.add_argument("--latency", type=float, default=0.0)
+    ap.add_argument("--quota-error-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    header = ["_uuid"] + [f"q{i}" for i in range(args.cols)]
+    body = np.column_stack([
+        np.array([f"uuid-{i:07d}" for i in range(args.rows)]),
+        rng.integers(0, 30, (args.rows, args.cols)).astype(str),
+    ]).tolist()
+
+    with tempfile.TemporaryDirectory() as folder:
+        sheet_writes.CHECKPOINT_DIR = os.path.join(folder, "_checkpoints")
+        seed = LocalSpreadsheet(folder)
+        seed.add_worksheet("Data_Set").update("A1", [header] + body)
+        seed.add_worksheet("Correction_Log").update("A1", [["_uuid", "Question", "old_value", "new_value"]])
+
+        sh = LocalSpreadsheet(folder, latency=args.latency, seed=1)
+        data_ws = sh.worksheet("Data_Set")
+        corr_ws = sh.worksheet("Correction_Log")
+        sh.quota_error_rate = args.quota_error_rate
+
+        print(f"rows={args.rows:,} cols={args.cols} latency={args.latency}s quota_error_rate={args.quota_error_rate}")
+
+        values = timed("load Data_Set", lambda: with_backoff(data_ws.get_all_values, base=0.05)[0])
+        if values is None:
+            return
+        data_df = pd.DataFrame(values[1:], columns=values[0])
+
+        # monitor: find one record
+        target = data_df["_uuid"].iloc[len(data_df) // 2]
+        timed("monitor lookup", lambda: data_df[data_df["_uuid"] == target].iloc[0])
+
+        # append to Correction_Log
+        corr = pd.DataFrame({
+            "_uuid": rng.choice(data_df["_uuid"].to_numpy(), args.corrections),
+            "Question": rng.choice(header[1:], args.corrections),
+            "old_value": "",
+            "new_value": rng.integers(100, 200, args.corrections).astype(str),
+        })
+        timed("append Correction_Log", lambda: append_rows_resumable(
+            corr_ws, corr.values.tolist(), chunk_rows=500, base=0.05))
+
+        # apply + write back
+        result = timed("apply corrections", lambda: apply_corrections(data_df, corr, "_uuid"))
+        if result is not None:
+            timed("write back (cell diff)", lambda: write_changed_cells(data_ws, data_df, result["changed_cells"]))
+            timed("write back (full rewrite)", lambda: write_full_sheet_chunked(data_ws, data_df))
+
+        print(f"simulated API calls: {sh.request_count}")
+
+
+if __name__ == "__main__":
+    main()
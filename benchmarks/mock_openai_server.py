@@ -0,0 +1,188 @@
+"""
+Local stand-in for the OpenAI chat completions endpoint, for exercising the
+async translator (utils.async_llm) without an API key.
+
+    python benchmarks/mock_openai_server.py --port 8765 --rpm 120 --latency 0.4
+
+POST /v1/chat/completions answers the batched JSON prompt of utils.llm_translate
+with "EN <text>" per segment, after --latency seconds (+ --per-segment each).
+Requests beyond --rpm get a 429 with retry-after; every reply carries
+x-ratelimit-limit/remaining/reset-requests headers like the real API.
+--drop-rate of multi-segment replies lose their last segment (bisection path)
+and --stall-rate of requests never answer in time (timeout path).
+
+With --bench, the server is started in-process and a run of the async runner
+is timed against it:
+
+    python benchmarks/mock_openai_server.py --bench --values 400 --concurrency 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_translate import estimate_tokens  # noqa: E402
+
+WORDS = ["کابل", "خانه", "آب", "نان", "کار", "مکتب", "کلینیک", "زمین", "قرض", "مهاجر", "فامیل", "باران"]
+
+
+class RequestWindow:
+    """Requests-per-minute limit over a sliding 60 s window (what x-ratelimit-*-requests describe)."""
+
+    def __init__(self, rpm: int):
+        self.rpm = rpm
+        self.stamps = []
+        self.lock = threading.Lock()
+
+    def take(self):
+        """(allowed, remaining, seconds until a slot frees up)."""
+        now = time.monotonic()
+        with self.lock:
+            self.stamps = [t for t in self.stamps if now - t < 60.0]
+            reset = 60.0 - (now - self.stamps[0]) if self.stamps else 0.0
+            if len(self.stamps) >= self.rpm:
+                return False, 0, reset
+            self.stamps.append(now)
+            return True, self.rpm - len(self.stamps), 60.0 - (now - self.stamps[0])
+
+
+def make_handler(args, window: RequestWindow, counters: dict):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def reply(self, status: int, body: dict, headers: dict):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(data)))
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self.reply(404, {"error": {"message": "not found"}}, {})
+
+            ok, remaining, reset = window.take()
+            headers = {
+                "x-ratelimit-limit-requests": str(window.rpm),
+                "x-ratelimit-remaining-requests": str(remaining),
+                "x-ratelimit-reset-requests": f"{reset:.3f}s",
+            }
+            with window.lock:
+                counters["requests"] += 1
+                counters["rejected"] += not ok
+            if not ok:
+                headers["retry-after"] = f"{max(reset, 0.1):.3f}"
+                return self.reply(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                                  "code": "rate_limit_exceeded"}}, headers)
+
+            with window.lock:
+                counters["prompt_tokens"] += sum(estimate_tokens(m["content"]) for m in body["messages"])
+            segments = json.loads(body["messages"][-1]["content"])["segments"]
+            out = [{"id": s["id"], "text": f"EN {s['text']}"} for s in segments]
+            if len(out) > 1 and random.random() < args.drop_rate:
+                out = out[:-1]
+            stall = args.stall if random.random() < args.stall_rate else 0.0
+            time.sleep(args.latency + args.per_segment * len(segments) + stall)
+
+            content = json.dumps({"translations": out}, ensure_ascii=False)
+            self.reply(200, {
+                "id": f"chatcmpl-mock-{counters['requests']}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }, headers)
+
+    return Handler
+
+
+def start(args):
+    """Starts the server on a daemon thread; returns (server, counters)."""
+    counters = {"requests": 0, "rejected": 0, "prompt_tokens": 0}
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, RequestWindow(args.rpm), counters))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counters
+
+
+def bench(args):
+    from openai import AsyncOpenAI
+
+    from utils.async_llm import translate_concurrent
+
+    server, counters = start(args)
+    base_url = f"http://{args.host}:{server.server_address[1]}/v1"
+    values = [" ".join(random.choices(WORDS, k=random.randint(1, 6))) + f" {i}" for i in range(args.values)]
+
+    def on_progress(done, total):
+        print(f"\r{done}/{total}", end="", flush=True)
+
+    t0 = time.perf_counter()
+    out, info = translate_concurrent(
+        lambda: AsyncOpenAI(api_key="mock", base_url=base_url, max_retries=0),
+        "mock-model", values, max_segments=args.segments, concurrency=args.concurrency,
+        timeout=args.timeout, progress=on_progress,
+    )
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+    print()
+
+    ok = sum(o == f"EN {v}" for o, v in zip(out, values))
+    print(f"values={len(values):,} translated={ok:,} failed={info['failed']} in {elapsed:.1f}s "
+          f"({len(values) / elapsed * 60:,.0f} values/min)")
+    print(f"requests={info['requests']} batches={info['batches']} bisections={info['bisections']} "
+          f"429s={info['rate_limited']} timeouts={info['timeouts']} peak concurrency={info['peak_concurrency']}")
+    print(f"server: {counters['requests']} requests, {counters['rejected']} rejected")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--rpm", type=int, default=120, help="requests per minute before 429s")
+    ap.add_argument("--latency", type=float, default=0.4, help="seconds per request")
+    ap.add_argument("--per-segment", type=float, default=0.02, help="extra seconds per segment")
+    ap.add_argument("--drop-rate", type=float, default=0.05)
+    ap.add_argument("--stall-rate", type=float, default=0.0)
+    ap.add_argument("--stall", type=float, default=120.0, help="seconds a stalled request hangs")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--bench", action="store_true", help="run the async translator against the server")
+    ap.add_argument("--values", type=int, default=400)
+    ap.add_argument("--segments", type=int, default=10, help="max segments per request")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--timeout", type=float, default=10.0)
+    args = ap.parse_args()
+    random.seed(args.seed)
+
+    if args.bench:
+        if args.port == 8765:
+            args.port = 0   # any free port
+        return bench(args)
+
+    server, counters = start(args)
+    print(f"mock OpenAI API on http://{args.host}:{args.port}/v1  (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"\n{counters['requests']} requests, {counters['rejected']} rejected")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@ import time
 from io import BytesIO
 from deep_translator import GoogleTranslator, MyMemoryTranslator
 
+from utils.translation import DEFAULT_WORKERS, MAX_WORKERS, PROVIDER_RATES, dedup_translate, get_limiter
+from utils.translation_memory import HUMAN, get_tm
+
 # ---------------------------
 # Page config
 # ---------------------------
@@ -258,22 +261,32 @@ def chunk_text(s: str, max_len: int = 4500):
 
 @st.cache_data(show_spinner=False)
 def cached_translate(provider: str, text: str, target: str = "en") -> str:
+    # only cache misses reach the provider, so only they take a token
+    get_limiter(provider).acquire()
     if provider == "google":
         return GoogleTranslator(source="auto", target=target).translate(text)
     return MyMemoryTranslator(source="auto", target=target).translate(text)
 
 def robust_translate(text: str, target: str, provider_order, retries=3, sleep_base=0.6) -> str:
+    # translation memory first: reviewed translations, then earlier results of these providers
+    tm = get_tm()
+    known = tm.get(text, [HUMAN, *provider_order], target)
+    if known is not None:
+        return known
+
     for provider in provider_order:
         for attempt in range(retries):
             try:
                 chunks = chunk_text(text, max_len=4500)
                 out = []
                 for ch in chunks:
-                    time.sleep(0.15)
                     out.append(cached_translate(provider, ch, target=target))
-                return "".join(out).strip()
+                result = "".join(out).strip()
+                tm.put(text, provider, result, target=target, origin="1233")
+                return result
             except Exception:
-                time.sleep(sleep_base * (2 ** attempt))
+                # most failures here are throttling: slow the provider down for every worker
+                get_limiter(provider).pause(sleep_base * (2 ** attempt))
     return text
 
 def translate_text(text, target="en", provider_order=None):
@@ -465,22 +478,26 @@ def main():
             help="Replace original values or add results as new column"
         )
 
-        batch_size = st.slider(
-            "📊 BATCH SIZE",
+        workers = st.slider(
+            "🧵 PARALLEL REQUESTS",
             min_value=1,
-            max_value=100,
-            value=10,
-            help="Smaller batch = less blocking risk."
+            max_value=MAX_WORKERS,
+            value=DEFAULT_WORKERS,
+            help="Rows translated at the same time. Speed is capped by the rate limits below."
         )
 
-        delay_ms = st.slider(
-            "⏱️ Delay per row (ms)",
-            min_value=0,
-            max_value=1500,
-            value=150,
-            step=50,
-            help="Higher delay = more stable, slower."
-        )
+        rate_cols = st.columns(2)
+        provider_rates = {}
+        for rc, provider in zip(rate_cols, ["google", "mymemory"]):
+            with rc:
+                provider_rates[provider] = st.slider(
+                    f"⏱️ {provider.title()} requests/sec",
+                    min_value=0.5,
+                    max_value=20.0,
+                    value=PROVIDER_RATES[provider],
+                    step=0.5,
+                    help="Shared by all users of this app. Lower = more stable, slower."
+                )
 
     st.markdown('</div>', unsafe_allow_html=True)
     st.markdown('<div class="holographic-divider"></div>', unsafe_allow_html=True)
@@ -500,46 +517,47 @@ def main():
         result_col_name = f"{column_to_translate}_OUT"
         df[result_col_name] = ""
 
-        total_processed = 0
-
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i + batch_size]
-
-            for idx, row in batch.iterrows():
-                original_text = str(row.get(column_to_translate, "") or "").strip()
-
-                progress_bar.progress((idx + 1) / len(df))
-                status_text.text(f"Processing row {idx+1} of {len(df)}...")
-
-                if delay_ms > 0:
-                    time.sleep(delay_ms / 1000.0)
-
-                # Always keep phrases unchanged (for translation mode)
-                protected_text, token_map = protect_phrases(original_text, do_not_translate_list)
-
-                if output_mode == "Transliterate only (Romanize names/places)":
-                    result = transliterate_arabic_to_latin(original_text)
-
-                elif output_mode == "Auto (Names -> Transliterate, Sentences -> Translate)":
-                    if detect_language(original_text) == "dari_pashto" and looks_like_name_or_place(original_text):
-                        result = transliterate_arabic_to_latin(original_text)
-                    else:
-                        result = translate_text(protected_text, target="en", provider_order=provider_order)
-                        result = restore_phrases(result, token_map)
-
-                else:
-                    # Translate meaning
-                    result = translate_text(protected_text, target="en", provider_order=provider_order)
-                    result = restore_phrases(result, token_map)
-
-                df.at[idx, result_col_name] = result
-                total_processed += 1
-
-            st.markdown(f"""
-            <script>
-            document.getElementById('total-translations').textContent = '{total_processed:,}';
-            </script>
-            """, unsafe_allow_html=True)
+        for provider, rate in provider_rates.items():
+            get_limiter(provider, rate)
+
+        def process(original_text):
+            # Always keep phrases unchanged (for translation mode)
+            protected_text, token_map = protect_phrases(original_text, do_not_translate_list)
+
+            if output_mode == "Transliterate only (Romanize names/places)":
+                return transliterate_arabic_to_latin(original_text)
+
+            if output_mode == "Auto (Names -> Transliterate, Sentences -> Translate)":
+                if detect_language(original_text) == "dari_pashto" and looks_like_name_or_place(original_text):
+                    return transliterate_arabic_to_latin(original_text)
+
+            # Translate meaning
+            result = translate_text(protected_text, target="en", provider_order=provider_order)
+            return restore_phrases(result, token_map)
+
+        def on_progress(done, total):
+            progress_bar.progress(done / total)
+            status_text.text(f"Processed {done:,} of {total:,} unique values...")
+
+        texts = pd.Series([str(v or "").strip() for v in df[column_to_translate]], dtype=object)
+        # only Arabic-script rows need work; each distinct (normalized) value is processed once,
+        # concurrently, and the results are mapped back to every row
+        needs = texts.str.contains(ARABIC_BLOCK_RE.pattern, regex=True).to_numpy()
+        started = time.perf_counter()
+        out, dedup = dedup_translate(texts, process, mask=needs, workers=workers, progress=on_progress)
+        df[result_col_name] = out.to_numpy()
+        total_processed = len(texts)
+
+        st.markdown(f"""
+        <script>
+        document.getElementById('total-translations').textContent = '{total_processed:,}';
+        </script>
+        """, unsafe_allow_html=True)
+        st.caption(f"⏱️ {time.perf_counter() - started:.1f}s with {workers} parallel requests")
+        st.info(
+            f"🔁 {dedup['to_translate']:,} Dari/Pashto rows → {dedup['unique']:,} unique values "
+            f"({dedup['saved']:.0%} fewer translator calls)"
+        )
 
         progress_bar.progress(1.0)
         status_text.text(f"✅ Completed! {total_processed} rows processed.")
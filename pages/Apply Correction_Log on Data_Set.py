@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from gspread.utils import rowcol_to_a1
 from datetime import datetime
 
+from utils.corrections import apply_corrections
+from utils.sheet_writes import write_changed_cells
+from utils.sheets import get_worksheet, invalidate, load_df
+from utils.translation_memory import get_tm
+
 # ===================== PAGE CONFIG (MUST BE FIRST) =====================
 st.set_page_config(page_title="Apply Corrections | IOM_CBPAHA", page_icon="🛠️", layout="wide")
 
@@ -128,60 +130,15 @@ st.sidebar.markdown("---")
 run_confirm = st.sidebar.checkbox("I confirm I want to update Google Sheet", value=False)
 
 # ===================== CONFIG =====================
-# ✅ برای لوکال:
-json_path = r"D:\IOM_CBPAHA\iomcbpaha-37221bb23bb2.json"
-sheet_id = "1AHTDIC9eAAitXwlR6wL_ruiTfZx6ytIuzJrV7GkHjQE"
 data_sheet_name = "Data_Set"
 correction_sheet_name = "Correction_Log"
-scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-
-# ===================== AUTH (Local OR Secrets) =====================
-def get_gspread_client():
-    """
-    Uses Streamlit Cloud secrets if available,
-    otherwise falls back to local JSON file (for local development).
-    """
-    try:
-        use_secrets = "gcp_service_account" in st.secrets
-    except Exception:
-        use_secrets = False
-
-    if use_secrets:
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            st.secrets["gcp_service_account"], scope
-        )
-    else:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            json_path, scope
-        )
-
-    return gspread.authorize(creds)
-
-
-@st.cache_resource(show_spinner=False)
-def load_worksheets():
-    client = get_gspread_client()
-    sh = client.open_by_key(sheet_id)
-    return (
-        sh.worksheet(data_sheet_name),
-        sh.worksheet(correction_sheet_name)
-    )
-
-@st.cache_data(show_spinner=False, ttl=60)
-def load_sheet_as_df(_ws):
-    values = _ws.get_all_values()
-    if not values or len(values) < 1:
-        return pd.DataFrame()
-    headers = values[0]
-    rows = values[1:] if len(values) > 1 else []
-    return pd.DataFrame(rows, columns=headers)
 
 
 # ===================== LOAD =====================
 with st.spinner("🔄 Connecting to Google Sheet..."):
-    data_ws, corr_ws = load_worksheets()
-    data_df = load_sheet_as_df(data_ws)
-    corr_df = load_sheet_as_df(corr_ws)
+    data_ws = get_worksheet(data_sheet_name)
+    data_df = load_df(data_sheet_name)
+    corr_df = load_df(correction_sheet_name)
 
 if data_df.empty:
     st.warning("Data_Set is empty.")
@@ -294,53 +251,19 @@ if apply_clicked:
         st.info("هیچ new_value برای اعمال وجود ندارد.")
         st.stop()
 
-    progress = st.progress(0)
-    status = st.empty()
+    with st.spinner("🧮 Applying corrections..."):
+        result = apply_corrections(
+            data_df,
+            corr_view,
+            uuid_col,
+            skip_empty=(mode == "Apply new_value only"),
+        )
 
-    applied_cells = 0
-    applied_rows = 0
-    errors = []
+    applied_cells = result["applied_cells"]
+    errors = result["errors"]
 
     # Track changes for reporting
-    change_log = []
-
-    total = len(corr_view)
-    for i, corr_row in corr_view.reset_index(drop=True).iterrows():
-        uuid = str(corr_row["_uuid"]).strip()
-        question = str(corr_row["Question"]).strip()
-        new_value = str(corr_row.get("new_value", "")).strip()
-
-        # mode: overwrite rule
-        if mode == "Apply new_value only" and new_value == "":
-            continue
-
-        if question not in data_df.columns:
-            errors.append(f"Column not found in Data_Set: {question}")
-            progress.progress(min(1.0, (i + 1) / total))
-            continue
-
-        mask = data_df[uuid_col].astype(str).str.strip() == uuid
-        if not mask.any():
-            errors.append(f"_uuid not found in Data_Set: {uuid}")
-            progress.progress(min(1.0, (i + 1) / total))
-            continue
-
-        # Apply on all matched rows (usually 1 row, but safe)
-        old_values = data_df.loc[mask, question].tolist()
-        data_df.loc[mask, question] = new_value
-
-        applied_rows += int(mask.sum())
-        applied_cells += int(mask.sum())
-
-        change_log.append({
-            "_uuid": uuid,
-            "Question": question,
-            "old_value_sample": old_values[0] if old_values else "",
-            "new_value": new_value
-        })
-
-        status.write(f"✅ Applying: {uuid} → {question}")
-        progress.progress(min(1.0, (i + 1) / total))
+    change_log = result["change_log"]
 
     if applied_cells == 0:
         st.info("هیچ تغییری اعمال نشد.")
@@ -353,11 +276,27 @@ if apply_clicked:
 
     # ---------------- UPDATE GOOGLE SHEET ----------------
     with st.spinner("📤 Updating Google Sheet (Data_Set)..."):
-        all_data = [data_df.columns.tolist()] + data_df.values.tolist()
-        end_cell = rowcol_to_a1(len(all_data), len(data_df.columns))
-        data_ws.update(f"A1:{end_cell}", all_data)
+        write_info = write_changed_cells(data_ws, data_df, result["changed_cells"])
+        invalidate(data_sheet_name)
+
+    if write_info["mode"] == "none":
+        st.info("All corrected cells already had these values — nothing to write.")
+    elif write_info["mode"] == "diff":
+        st.success(
+            f"✅ Data_Set updated successfully in Google Sheet "
+            f"({write_info['cells']:,} cells in {write_info['ranges']:,} ranges, 1 request)."
+        )
+    else:
+        st.success(
+            f"✅ Data_Set updated successfully in Google Sheet "
+            f"(large change set → full rewrite in {write_info['requests']} chunks)."
+        )
 
-    st.success("✅ Data_Set updated successfully in Google Sheet.")
+    # Reviewed Dari/Pashto -> English pairs go into the translation memory for the translator pages
+    if "old_value" in corr_view.columns:
+        learned = get_tm().import_frame(corr_view, "old_value", "_new_value_str", origin=correction_sheet_name)
+        if learned:
+            st.caption(f"📚 {learned:,} reviewed translations saved to the translation memory.")
 
     # ---------------- REPORTING ----------------
     st.markdown('<hr class="divider">', unsafe_allow_html=True)
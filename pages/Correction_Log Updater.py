@@ -1,8 +1,8 @@
 import streamlit as st
 import pandas as pd
-import re
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+
+from utils.sheets import get_worksheet, load_df
+from utils.updater_flow import detect_records, offer_resume, push_new_records
 
 # ===================== PAGE CONFIG (MUST BE FIRST) =====================
 st.set_page_config(page_title="Correction Log Helper", page_icon="📝", layout="wide")
@@ -120,121 +120,17 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ----------------- CONFIG -----------------
-json_path = r"D:\IOM_CBPAHA\iomcbpaha-37221bb23bb2.json"
-sheet_id = "1AHTDIC9eAAitXwlR6wL_ruiTfZx6ytIuzJrV7GkHjQE"
-
 data_sheet_name = "Data_Set"
 correction_sheet_name = "Correction_Log"
-
-scope = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
-
-# ----------------- AUTH -----------------
-def get_gspread_client():
-    """
-    Uses Streamlit Cloud secrets if available,
-    otherwise falls back to local JSON file (for local development).
-    """
-    try:
-        use_secrets = "gcp_service_account" in st.secrets
-    except Exception:
-        use_secrets = False
-
-    if use_secrets:
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            st.secrets["gcp_service_account"], scope
-        )
-    else:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            json_path, scope
-        )
-
-    return gspread.authorize(creds)
-
-
-@st.cache_resource(show_spinner=False)
-def load_worksheets():
-    client = get_gspread_client()
-    sh = client.open_by_key(sheet_id)
-    # اگر Correction_Log وجود نداشت، اینجا خطا می‌دهد (مثل قبل)
-    return sh.worksheet(data_sheet_name), sh.worksheet(correction_sheet_name)
-
-
-# ----------------- Helpers -----------------
-def make_unique_headers(header_row):
-    seen = {}
-    new_cols = []
-    for c in header_row:
-        key = c if c is not None else ""
-        if key in seen:
-            seen[key] += 1
-            new_cols.append(f"{key}_{seen[key]}")
-        else:
-            seen[key] = 0
-            new_cols.append(key)
-    return new_cols
-
-
-def contains_persoarabic(text):
-    if text is None:
-        return False
-    return bool(re.search(r'[\u0600-\u06FF]+', str(text)))
-
-
-def load_sheet_dataframe(ws):
-    values = ws.get_all_values()
-    if not values:
-        return pd.DataFrame()
-
-    header = make_unique_headers(values[0])
-    data = values[1:]
-
-    if not data:
-        return pd.DataFrame(columns=header)
-
-    return pd.DataFrame(data, columns=header)
+CORR_HEADER = ["_uuid", "Question", "old_value"]
 
 
 # ----------------- LOAD SHEETS -----------------
-data_ws = client.open_by_key(sheet_id).worksheet(data_sheet_name)
-
 # Load Correction_Log sheet or create if missing
-try:
-    corr_ws = client.open_by_key(sheet_id).worksheet(correction_sheet_name)
-except gspread.exceptions.WorksheetNotFound:
-    sh = client.open_by_key(sheet_id)
-    corr_ws = sh.add_worksheet(title=correction_sheet_name, rows="2000", cols="20")
-def make_unique_headers(header_row):
-    seen = {}
-    new_cols = []
-    for c in header_row:
-        key = c if c is not None else ""
-        if key in seen:
-            seen[key] += 1
-            new_cols.append(f"{key}_{seen[key]}")
-        else:
-            seen[key] = 0
-            new_cols.append(key)
-    return new_cols
-
-
-def load_sheet_dataframe(ws):
-    values = ws.get_all_values()
-    if not values:
-        return pd.DataFrame()
-
-    header = make_unique_headers(values[0])
-    data = values[1:]
-
-    if not data:
-        return pd.DataFrame(columns=header)
-
-    return pd.DataFrame(data, columns=header)
-
-# Load Data_Set as DataFrame
-df_data = load_sheet_dataframe(data_ws)
+corr_ws = get_worksheet(correction_sheet_name, header=CORR_HEADER)
+
+# Load Data_Set as DataFrame (shared cache)
+df_data = load_df(data_sheet_name, unique_headers=True)
 
 # ===================== TOP SUMMARY (UI ONLY) =====================
 if df_data.empty:
@@ -247,24 +143,7 @@ if uuid_col is None:
     st.stop()
 
 # ----------------- Build detected records -----------------
-records = []
-
-for _, row in df_data.iterrows():
-    row_uuid = str(row.get(uuid_col, "")).strip()
-    if not row_uuid:
-        continue
-
-    for col in df_data.columns:
-        if col == uuid_col:
-            continue
-
-        val = row[col]
-        if contains_persoarabic(val):
-            records.append({
-                "_uuid": row_uuid,
-                "Question": col,
-                "old_value": val
-            })
+records, scanned_rows = detect_records(data_sheet_name, uuid_col, df_data)
 
 # ===================== SUMMARY CARDS (UI ONLY) =====================
 c1, c2, c3 = st.columns(3)
@@ -291,7 +170,7 @@ with c3:
     <div class="card">
       <div class="badge badge-green">DETECTED</div>
       <div style="font-size:1.65rem; font-weight:800; color:#fff;">{len(records):,}</div>
-      <div class="small-note">Cells containing Dari/Pashto</div>
+      <div class="small-note">Cells containing Dari/Pashto ({scanned_rows:,} rows scanned this run)</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -322,11 +201,11 @@ When clicking <b>Add to Correction_Log</b>, only <b>new</b> records will be adde
 st.markdown('<hr class="divider">', unsafe_allow_html=True)
 
 # ===================== DETECTED TABLE =====================
-if not records:
+if records.empty:
     st.info("No Dari/Pashto text found.")
     st.stop()
 
-out_df = pd.DataFrame(records).sort_values("Question")
+out_df = records.sort_values("Question")
 
 st.markdown('<div class="card">', unsafe_allow_html=True)
 st.subheader("🔎 Detected Dari/Pashto Records (sorted by Question)")
@@ -345,55 +224,39 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ----------------- SAVE TO GOOGLE SHEET -----------------
+offer_resume(corr_ws, correction_sheet_name)
+
+rebuild_index = st.checkbox(
+    "🔁 Re-scan the whole Correction_Log (use after rows were edited or deleted by hand)",
+    value=False,
+)
+
+prefill = st.checkbox(
+    "💡 Pre-fill new_value with reviewed translations from the translation memory",
+    value=False,
+)
+
+
 if st.button("⬆️ Add to Correction_Log", type="primary"):
 
-    existing = corr_ws.get_all_values()
-
-    # If sheet is brand new → create header
-    if not existing:
-        header = ["_uuid", "Question", "old_value"]
-        corr_ws.update("A1:C1", [header])
-        existing = [header]
-
-    # Load existing rows into dataframe
-    corr_df = pd.DataFrame(existing[1:], columns=existing[0])
-
-    # Build lookup set
-    existing_keys = {
-        f"{r['_uuid']}|{r['Question']}|{r['old_value']}"
-        for _, r in corr_df.iterrows()
-    }
-
-    # Identify new rows to add
-    rows_to_append = []
-    for rec in records:
-        key = f"{rec['_uuid']}|{rec['Question']}|{rec['old_value']}"
-        if key not in existing_keys:
-            rows_to_append.append([
-                rec["_uuid"],
-                rec["Question"],
-                rec["old_value"]
-            ])
-            existing_keys.add(key)
-
-    if not rows_to_append:
+    pushed = push_new_records(corr_ws, correction_sheet_name, records, CORR_HEADER,
+                              rebuild_index=rebuild_index, prefill=prefill)
+
+    if pushed is None:
         st.warning("No NEW records. Everything already exists.")
     else:
-        # Sort rows by Question before appending
-        rows_to_append.sort(key=lambda x: x[1])
-
-        next_row = len(existing) + 1
-        corr_ws.update(
-            f"A{next_row}:C{next_row + len(rows_to_append) - 1}",
-            rows_to_append
-        )
+        rows_to_append, info, suggested = pushed
 
         st.success(f"✅ {len(rows_to_append)} new records added!")
+        if prefill:
+            st.caption(f"💡 {suggested:,} of them got a reviewed new_value from the translation memory.")
+        if info["retries"]:
+            st.caption(f"{info['requests']} requests, {info['retries']} retries after quota errors.")
 
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("✅ Newly Added Rows (sorted by Question)")
         st.dataframe(
-            pd.DataFrame(rows_to_append, columns=["_uuid", "Question", "old_value"]).sort_values("Question"),
+            pd.DataFrame([r[:3] for r in rows_to_append], columns=["_uuid", "Question", "old_value"]).sort_values("Question"),
             use_container_width=True
         )
         st.markdown("</div>", unsafe_allow_html=True)
@@ -2,10 +2,17 @@ import streamlit as st
 import pandas as pd
 import re
 from io import BytesIO
-from openai import OpenAI
+from openai import AsyncOpenAI
 
-# Initialize OpenAI client
-client = OpenAI(api_key=st.secrets.get("OPENAI_API_KEY", ""))
+from utils.async_llm import MAX_CONCURRENCY, REQUEST_TIMEOUT, translate_concurrent
+from utils.llm_translate import BATCH_TOKEN_BUDGET
+from utils.translation import dedup_translate
+from utils.translation_memory import HUMAN, get_tm
+
+# OpenAI client factory: a fresh async client per run (it belongs to that run's event loop);
+# retries are handled by utils.async_llm, which adapts to 429s and rate-limit headers
+def make_client():
+    return AsyncOpenAI(api_key=st.secrets.get("OPENAI_API_KEY", ""), max_retries=0, timeout=REQUEST_TIMEOUT)
 
 st.set_page_config(
     page_title="Dari/Pashto Translator Pro",
@@ -417,43 +424,6 @@ def detect_language(text):
     
     return "unknown"
 
-def translate_text(text, model="gpt-4.1-mini"):
-    """Translate Dari/Pashto text to English using OpenAI"""
-    if pd.isna(text) or str(text).strip() == "":
-        return text
-    
-    text_str = str(text).strip()
-    
-    # Check if it's already English
-    if detect_language(text_str) == "english":
-        return text_str
-    
-    try:
-        prompt = f"""
-        Detect the language of this text (Dari, Pashto, or English).
-        If the text is Dari or Pashto, translate it into simple, human, non-native English.
-        Do NOT normalize or paraphrase. Keep the meaning exactly as is.
-        If the text is already in English, return it as is.
-        
-        Text to translate:
-        "{text_str}"
-        
-        Translation:
-        """
-        
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-            max_tokens=500
-        )
-        
-        return response.choices[0].message.content.strip()
-    
-    except Exception as e:
-        st.error(f"Translation error: {str(e)}")
-        return text_str
-
 def create_translation_sheet(df, original_col, translated_col, key_col=None):
     """Create a separate sheet with key, old value, new value format"""
     translation_data = []
@@ -619,8 +589,26 @@ def main():
             "📊 BATCH SIZE",
             min_value=1,
             max_value=100,
-            value=10,
-            help="Number of rows to translate at once"
+            value=40,
+            help="Max Dari/Pashto values sent in one request (1 = one request per value)"
+        )
+        
+        token_budget = st.slider(
+            "🧮 TOKENS PER REQUEST",
+            min_value=250,
+            max_value=6000,
+            value=BATCH_TOKEN_BUDGET,
+            step=250,
+            help="Approximate source-text tokens packed into one request",
+            disabled=batch_size == 1
+        )
+        
+        concurrency = st.slider(
+            "⚡ PARALLEL REQUESTS",
+            min_value=1,
+            max_value=MAX_CONCURRENCY,
+            value=8,
+            help="Upper bound on requests in flight; lowered automatically when OpenAI rate-limits"
         )
     
     st.markdown('</div>', unsafe_allow_html=True)
@@ -663,33 +651,64 @@ def main():
         translated_col_name = f"{column_to_translate}_EN"
         df[translated_col_name] = ""
         
-        # Perform translation in batches
-        total_translated = 0
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
-            
-            for idx, row in batch.iterrows():
-                original_text = row[column_to_translate]
-                
-                # Update progress
-                progress = (i + idx - i + 1) / len(df)
-                progress_bar.progress(progress)
-                status_text.text(f"Translating row {idx+1} of {len(df)}...")
-                
-                # Translate if needed
-                if detect_language(original_text) == "dari_pashto":
-                    translated = translate_text(original_text, model)
-                    df.at[idx, translated_col_name] = translated
-                    total_translated += 1
-                else:
-                    df.at[idx, translated_col_name] = str(original_text)
-            
-            # Update stats dynamically
-            st.markdown(f"""
-            <script>
-            document.getElementById('total-translations').textContent = '{total_translated:,}';
-            </script>
-            """, unsafe_allow_html=True)
+        # Translate each distinct Dari/Pashto value once and map it back to every row
+        def on_progress(done, total):
+            progress_bar.progress(done / total)
+            status_text.text(f"Translating unique value {done:,} of {total:,}...")
+
+        engine = f"openai:{model}"
+        batch_info = {}
+
+        def translate_batched(values, progress):
+            # translation memory first; the rest goes out as numbered multi-segment requests
+            tm = get_tm()
+            known = tm.lookup(values, [HUMAN, engine])
+            todo = [i for i, k in enumerate(known) if k is None]
+            done_before = len(values) - len(todo)
+            if not todo:
+                batch_info.update(requests=0, bisections=0, failed=0, from_memory=done_before)
+                return known
+            translated, info = translate_concurrent(
+                make_client, model, [values[i] for i in todo], budget=token_budget, max_segments=batch_size,
+                concurrency=concurrency, progress=lambda done, total: progress(done_before + done, len(values)),
+            )
+            tm.put_many([(values[i], t) for i, t in zip(todo, translated) if t is not None], engine, origin="English_translator")
+            batch_info.update(info, from_memory=done_before)
+            for i, t in zip(todo, translated):
+                known[i] = t if t is not None else values[i]
+            return known
+
+        source = df[column_to_translate]
+        needs = source.map(detect_language).eq("dari_pashto").to_numpy()
+        out, dedup = dedup_translate(source, mask=needs, progress=on_progress, batch_fn=translate_batched)
+        df[translated_col_name] = out.where(needs, source.astype(str)).to_numpy()
+        total_translated = int(needs.sum())
+
+        # Update stats dynamically
+        st.markdown(f"""
+        <script>
+        document.getElementById('total-translations').textContent = '{total_translated:,}';
+        </script>
+        """, unsafe_allow_html=True)
+        st.info(
+            f"🔁 {dedup['to_translate']:,} Dari/Pashto rows → {dedup['unique']:,} unique values "
+            f"({dedup['saved']:.0%} fewer API calls)"
+        )
+        if batch_info:
+            st.caption(
+                f"📦 {batch_info['from_memory']:,} from translation memory • {batch_info['requests']:,} requests "
+                f"for {dedup['unique'] - batch_info['from_memory']:,} values • {batch_info['bisections']} split retries"
+                + (
+                    f" • {batch_info['rate_limited']} rate-limited, {batch_info['timeouts']} timed out, "
+                    f"up to {batch_info['peak_concurrency']} in parallel"
+                    if "peak_concurrency" in batch_info else ""
+                )
+            )
+            if batch_info["failed"]:
+                st.warning(
+                    f"⚠️ {batch_info['failed']:,} values could not be translated and were kept as-is"
+                    + (f": {batch_info['error']}" if batch_info.get("error") else ".")
+                )
         
         progress_bar.progress(1.0)
         status_text.text(f"✅ Translation completed! {total_translated} rows translated.")
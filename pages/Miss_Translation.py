@@ -3,6 +3,8 @@ import pandas as pd
 import re
 from io import BytesIO
 
+from utils.translation_memory import get_tm
+
 st.set_page_config(
     page_title="Translation Extractor Pro",
     page_icon="✨",
@@ -489,6 +491,33 @@ st.markdown("""
 
 st.markdown('<div class="holographic-divider"></div>', unsafe_allow_html=True)
 
+with st.expander("📚 Import a reviewed Translation_List into the translation memory"):
+    st.caption(
+        "Upload a Translation_List exported here after reviewers added an English column. "
+        "Those translations are reused by the translator pages instead of calling a translator again."
+    )
+    reviewed = st.file_uploader("Reviewed Translation_List", type=["xlsx", "xlsm", "csv"], key="tm_upload")
+    if reviewed is not None:
+        try:
+            rmeta = read_dataset(reviewed)
+            rdf = rmeta["df"] if rmeta["type"] == "csv" else pd.read_excel(
+                rmeta["xls"], sheet_name=rmeta["sheets"][0], dtype=str, keep_default_na=False
+            )
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
+            rdf = None
+
+        extra_cols = [c for c in (rdf.columns if rdf is not None else []) if c not in ("key", "label", "value", "row_index")]
+        if rdf is not None and ("value" not in rdf.columns or not extra_cols):
+            st.warning("Expected the Translation_List columns (key, label, value, ...) plus a translation column.")
+        elif rdf is not None:
+            guess = next((i for i, c in enumerate(extra_cols) if re.search(r"transl|english|new_value", str(c), re.I)), 0)
+            translation_col = st.selectbox("Translation column", extra_cols, index=guess, key="tm_col")
+            if st.button("📥 Import into translation memory", key="tm_import"):
+                added = get_tm().import_frame(rdf, "value", translation_col, origin=reviewed.name)
+                st.success(f"✅ {added:,} reviewed translations imported.")
+                st.caption(f"Translation memory: {get_tm().stats()['entries']:,} entries")
+
 st.markdown('<div class="quantum-card"><div class="section-title">📤 UPLOAD DATASET</div>', unsafe_allow_html=True)
 uploaded = st.file_uploader(
     "Drag & Drop or Click to Upload",
@@ -1,81 +1,29 @@
+import re
+import uuid
+
 import streamlit as st
 import pandas as pd
-import re
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 
-# ---------------- CONFIG ----------------
-json_path = r"D:\IOM_CBPAHA\iomcbpaha-37221bb23bb2.json"
-sheet_id = "1AHTDIC9eAAitXwlR6wL_ruiTfZx6ytIuzJrV7GkHjQE"
+from utils.attention import attention_values, get_attention, ranked_records, record_attention
+from utils.detection import contains_persoarabic
+from utils.profiles import field_type, get_profile
+from utils.records import get_header, get_record, prefetch_records
+from utils.sheet_writes import AppendInProgress, append_rows_resumable
+from utils.sheets import get_worksheet, invalidate, load_df
 
+# ---------------- CONFIG ----------------
 DATA_SHEET = "Data_Set"
 CORR_SHEET = "Correction_Log_1"
 HIDE_SHEET = "Not_Show_in_form"     # ✅ NEW
 HIDE_LABEL_COL = "Labels"           # ✅ NEW
 
-scope = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
-import streamlit as st
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-
-scope = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
-
-def get_gspread_client():
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(
-        st.secrets["gcp_service_account"], scope
-    )
-    return gspread.authorize(creds)
-
-client = get_gspread_client()
-
-# ---------------- AUTH ----------------
-
-sh = client.open_by_key(sheet_id)
-def get_gspread_client():
-    try:
-        use_secrets = "gcp_service_account" in st.secrets
-    except Exception:
-        use_secrets = False
-
-    if use_secrets:
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            st.secrets["gcp_service_account"], scope
-        )
-    else:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(json_path, scope)
-
-    return gspread.authorize(creds)
-
-client = get_gspread_client()
-
-data_ws = sh.worksheet(DATA_SHEET)
+CORR_HEADER = ["_uuid", "Question", "old_value", "new_value", "Edited_By"]
 
-try:
-    corr_ws = sh.worksheet(CORR_SHEET)
-except gspread.exceptions.WorksheetNotFound:
-    corr_ws = sh.add_worksheet(title=CORR_SHEET, rows="3000", cols="10")
-    corr_ws.update("A1:E1", [["_uuid", "Question", "old_value", "new_value", "Edited_By"]])
+corr_ws = get_worksheet(CORR_SHEET, header=CORR_HEADER, rows=3000, cols=10)
 
 
 # ---------------- HELPERS ----------------
-def contains_persoarabic(text):
-    # Persian/Arabic block (covers Dari/Pashto/Arabic)
-    return bool(re.search(r'[\u0600-\u06FF]', str(text)))
-
-
-def load_df(ws):
-    v = ws.get_all_values()
-    if not v or len(v) < 2:
-        return pd.DataFrame()
-    return pd.DataFrame(v[1:], columns=v[0])
-
-
 def normalize_val(x):
     if x is None:
         return ""
@@ -90,11 +38,10 @@ def load_hide_labels() -> set:
     Any value in Labels = a column name to hide in the form.
     """
     try:
-        ws_hide = sh.worksheet(HIDE_SHEET)
+        df_hide = load_df(HIDE_SHEET)
     except gspread.exceptions.WorksheetNotFound:
         return set()
 
-    df_hide = load_df(ws_hide)
     if df_hide.empty or HIDE_LABEL_COL not in df_hide.columns:
         return set()
 
@@ -117,19 +64,19 @@ def load_hide_labels() -> set:
     return out
 
 
-def needs_attention(old_val: str) -> bool:
-    """
-    Filter Mode logic:
-    show only if empty-like OR contains Dari/Pashto/Arabic script.
-    """
-    v = normalize_val(old_val)
-    if not v:
-        return True
-    if v.strip().lower() in ["n/a", "na", "null", "none", "nan", "-", "--"]:
-        return True
-    if contains_persoarabic(v):
-        return True
-    return False
+def visible_questions(columns) -> list:
+    """All columns except _uuid and the ones listed in Not_Show_in_form."""
+    hidden = {x.strip().lower() for x in load_hide_labels()}
+    return [c for c in columns if c != "_uuid" and c.strip().lower() not in hidden]
+
+
+def merge_pending(pending: dict, changes: dict):
+    """Section edits -> pending edits (a None change drops an earlier pending edit)."""
+    for key, change in changes.items():
+        if change is None:
+            pending.pop(key, None)
+        else:
+            pending[key] = change
 
 
 # ---------------- LIQUID GLASS UI ----------------
@@ -140,6 +87,13 @@ CURRENT_MIN_H = 100
 CURRENT_MAX_H = 200
 NEW_TEXT_H = 100
 
+# Review queue: records read ahead in the background
+QUEUE_PREFETCH = 5
+
+# Form pagination: fields rendered per section
+PAGE_SIZES = [10, 20, 30, 50]
+DEFAULT_PAGE_SIZE = 20
+
 st.markdown(f"""
 <style>
 @keyframes gradientShift {{
@@ -334,10 +288,18 @@ st.markdown("""
 st.markdown('<div class="glass-card" style="margin-top:-10px;">', unsafe_allow_html=True)
 st.markdown("<h3 style='margin-top:0;color:#a8edea;'>📋 Session Configuration</h3>", unsafe_allow_html=True)
 
+review_mode = st.radio("Mode", ["Single record", "Review queue"], horizontal=True, key="review_mode")
+
 col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
 
 with col1:
-    uuid_input = st.text_input("Record Identifier", placeholder="Enter _uuid ...", key="uuid_input")
+    if review_mode == "Single record":
+        uuid_input = st.text_input("Record Identifier", placeholder="Enter _uuid ...", key="uuid_input")
+    else:
+        queue = st.session_state.get("review_queue", [])
+        queue_pos = min(st.session_state.get("queue_pos", 0), max(len(queue) - 1, 0))
+        uuid_input = queue[queue_pos] if queue else ""
+        st.text_input("Record Identifier", value=uuid_input, disabled=True, key=f"queue_uuid_{queue_pos}")
 
 with col2:
     editor_name = st.text_input("Editor Profile", placeholder="Your name ...", key="editor_name")
@@ -352,52 +314,96 @@ with col4:
 
 st.markdown("</div>", unsafe_allow_html=True)
 
+# ---------------- REVIEW QUEUE ----------------
+if review_mode == "Review queue":
+    with st.expander("🗂️ Build review queue", expanded=not st.session_state.get("review_queue")):
+        source = st.radio("Queue source", ["UUID list", "All records needing attention"], horizontal=True, key="queue_source")
+        uuid_text = ""
+        if source == "UUID list":
+            uuid_text = st.text_area("UUIDs (one per line, or separated by commas / spaces)", key="queue_text")
+
+        if st.button("📥 Build queue", key="build_queue"):
+            if source == "UUID list":
+                new_queue = list(dict.fromkeys(u for u in re.split(r"[\s,;]+", uuid_text) if u))
+            else:
+                with st.spinner("Finding records that need attention..."):
+                    att = get_attention(DATA_SHEET)
+                    new_queue = ranked_records(att, visible_questions(att["columns"]))["_uuid"].tolist()
+            st.session_state["review_queue"] = new_queue
+            st.session_state["queue_pos"] = 0
+            st.rerun()
+
+    queue = st.session_state.get("review_queue", [])
+    if queue:
+        queue_pos = min(st.session_state.get("queue_pos", 0), len(queue) - 1)
+
+        n1, n2, n3 = st.columns([1, 3, 1])
+        with n1:
+            if st.button("◀ Previous", disabled=queue_pos == 0, use_container_width=True):
+                st.session_state["queue_pos"] = queue_pos - 1
+                st.rerun()
+        with n2:
+            st.progress((queue_pos + 1) / len(queue), text=f"Record {queue_pos + 1:,} of {len(queue):,}")
+        with n3:
+            if st.button("Next ▶", disabled=queue_pos >= len(queue) - 1, use_container_width=True):
+                st.session_state["queue_pos"] = queue_pos + 1
+                st.rerun()
+
+        # read the next records in the background while this one is being edited
+        prefetch_records(DATA_SHEET, queue[queue_pos + 1:queue_pos + 1 + QUEUE_PREFETCH])
+
+# ---------------- ATTENTION OVERVIEW ----------------
+with st.expander("🚩 Records needing attention (ranked by count)"):
+    # dataset-wide attention matrix, computed once per revision for all sessions
+    if st.toggle("Show overview", value=False, key="show_attention_overview"):
+        att = get_attention(DATA_SHEET)
+        ranked = ranked_records(att, visible_questions(att["columns"]))
+        st.caption(
+            f"{len(ranked):,} of {len(att['uuids']):,} records have at least one field that is "
+            "empty / NA or contains Dari/Pashto."
+        )
+        st.dataframe(ranked.head(1000), use_container_width=True, hide_index=True)
+        if st.button("🗂️ Use as review queue", key="overview_to_queue"):
+            st.session_state["review_queue"] = ranked["_uuid"].tolist()
+            st.session_state["queue_pos"] = 0
+            st.success("Queue ready — switch Mode to 'Review queue'.")
+
 if not uuid_input or not editor_name:
-    st.info("Please enter _uuid and your name to begin.")
+    if review_mode == "Review queue":
+        st.info("Build a review queue and enter your name to begin.")
+    else:
+        st.info("Please enter _uuid and your name to begin.")
     st.stop()
 
 
-# ---------------- LOAD DATA ----------------
-df = load_df(data_ws)
+# ---------------- LOAD RECORD ----------------
+# header + one row range through the cached _uuid index (no full-grid download per rerun)
+header = get_header(DATA_SHEET)
 
-if df.empty:
+if not header:
     st.error("❌ Data_Set is empty.")
     st.stop()
 
-if "_uuid" not in df.columns:
+if "_uuid" not in header:
     st.error("❌ Data_Set sheet must contain _uuid column.")
     st.stop()
 
-if uuid_input not in df["_uuid"].astype(str).values:
+row = get_record(DATA_SHEET, uuid_input)
+
+if row is None:
     st.error("❌ _uuid not found in Data_Set.")
     st.stop()
 
 # ✅ Load hidden labels and remove those columns from questions
 hidden_labels = load_hide_labels()
-hidden_labels_lower = {x.strip().lower() for x in hidden_labels}
-
-row = df[df["_uuid"].astype(str) == str(uuid_input)].iloc[0]
 
 # ✅ Exclude hidden columns
-questions_all = [c for c in df.columns if c != "_uuid"]
-questions = [c for c in questions_all if c.strip().lower() not in hidden_labels_lower]
+questions = visible_questions(header)
 
 # ---------------- ANALYZE QUESTIONS ----------------
-question_types = {}
-for q in questions:
-    # safe unique extraction
-    uniq = (
-        df[q].astype(str).map(lambda x: x.strip())
-        .replace({"": pd.NA, "nan": pd.NA, "None": pd.NA})
-        .dropna()
-        .unique()
-        .tolist()
-    )
-
-    if len(uniq) <= 7:
-        question_types[q] = ("select", sorted(uniq))
-    else:
-        question_types[q] = ("text", None)
+# select (<= 7 distinct answers) vs text, from the shared per-revision dataset profile
+profile = get_profile(DATA_SHEET)
+question_types = {q: field_type(profile, q) for q in questions}
 
 # ---------------- PANEL HEADER ----------------
 st.markdown(f"""
@@ -423,12 +429,22 @@ st.markdown(f"""
 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
 # ---------------- FORM ----------------
-changes = []
-edited_count = 0
+# Pending edits live in session_state across sections: {(uuid, question): [uuid, q, old, new, editor]}
+pending = st.session_state.setdefault("pending_edits", {})
+
+# needs-attention fields first; Filter Mode hides the rest.
+# Flags come from the cached per-revision matrix; a record missing from it is checked directly
+flags = record_attention(get_attention(DATA_SHEET), uuid_input, questions)
+if flags is None:
+    flags = attention_values([row[q] for q in questions])
+attention = dict(zip(questions, flags))
+form_fields = [q for q in questions if attention[q]]
+if not show_only_needed:
+    form_fields += [q for q in questions if not attention[q]]
 
 # ✅ GLOBAL EDIT CONTROLS
 st.markdown('<div class="glass-card">', unsafe_allow_html=True)
-cA, cB, cC = st.columns([2, 2, 2])
+cA, cB, cC, cD = st.columns([2, 2, 1, 2])
 
 with cA:
     edit_all = st.toggle("✏️ Edit ALL fields", value=False, key="edit_all_toggle")
@@ -437,21 +453,43 @@ with cB:
     lock_all = st.toggle("🔒 Lock ALL fields", value=False, key="lock_all_toggle")
 
 with cC:
-    st.caption("اگر Edit All روشن باشد، دیگر نیازی به تیک زدن تک‌تک سوال‌ها نیست.")
+    page_size = st.selectbox("Fields / section", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE), key="page_size")
+
+n_sections = max(1, -(-len(form_fields) // page_size))
+
+# back to the first section when the record or the layout changes
+form_sig = (uuid_input, show_only_needed, page_size)
+if st.session_state.get("form_sig") != form_sig:
+    st.session_state["form_sig"] = form_sig
+    st.session_state["form_section"] = 1
+if "form_section_next" in st.session_state:
+    st.session_state["form_section"] = st.session_state.pop("form_section_next")
+st.session_state["form_section"] = min(st.session_state.get("form_section", 1), n_sections)
+
+with cD:
+    section = st.selectbox(
+        "Section",
+        list(range(1, n_sections + 1)),
+        format_func=lambda i: f"{i} / {n_sections}",
+        key="form_section",
+    )
 
+st.caption("اگر Edit All روشن باشد، دیگر نیازی به تیک زدن تک‌تک سوال‌ها نیست.")
+st.caption("Click 💾 Keep edits before switching sections — edits are only kept when the form is submitted.")
 st.markdown("</div>", unsafe_allow_html=True)
 st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
+section_fields = form_fields[(section - 1) * page_size:section * page_size]
+changes = {}
+
 with st.form("cleaning_form", clear_on_submit=False):
 
-    for idx, q in enumerate(questions):
+    # only the current section is rendered -> element count per rerun stays flat
+    for q in section_fields:
         old_val = normalize_val(row[q])
         q_type, options = question_types[q]
         rtl = contains_persoarabic(old_val)
-
-        # ✅ Filter Mode only hides fields not needing attention
-        if show_only_needed and not needs_attention(old_val):
-            continue
+        pending_val = pending.get((uuid_input, q), [None] * 4)[3]
 
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
 
@@ -464,15 +502,16 @@ with st.form("cleaning_form", clear_on_submit=False):
                 <h4 style="margin:0;color:#ffffff;font-weight:500;">{q}</h4>
                 <span class="status-badge {badge_class}">{badge_type}</span>
                 {('<span class="status-badge badge-rtl">RTL</span>' if rtl else '')}
+                {('<span class="status-badge badge-rtl">PENDING</span>' if pending_val is not None else '')}
             </div>
             """, unsafe_allow_html=True)
 
-        # ✅ per-field edit flag with stable session_state
-        field_key = f"do_{q}"
+        # ✅ per-field edit flag with stable session_state (scoped to the record)
+        field_key = f"do_{uuid_input}_{q}"
 
-        # initialize state
+        # initialize state (fields with a pending edit start unlocked)
         if field_key not in st.session_state:
-            st.session_state[field_key] = False
+            st.session_state[field_key] = pending_val is not None
 
         # apply global toggles
         if lock_all:
@@ -484,6 +523,7 @@ with st.form("cleaning_form", clear_on_submit=False):
             st.checkbox("✏️ Edit", key=field_key)
 
         do_edit = st.session_state[field_key]
+        start_val = old_val if pending_val is None else pending_val
 
         colA, colB = st.columns(2)
 
@@ -509,29 +549,28 @@ with st.form("cleaning_form", clear_on_submit=False):
             new_val = old_val
 
             if do_edit:
-                edited_count += 1
                 st.markdown('<div class="new-value-area">', unsafe_allow_html=True)
 
                 if q_type == "select":
-                    safe_options = list(dict.fromkeys([old_val] + (options if options else [])))
+                    safe_options = list(dict.fromkeys([old_val, start_val] + (options if options else [])))
                     if not safe_options:
                         safe_options = [""]
 
-                    idx_option = safe_options.index(old_val) if old_val in safe_options else 0
+                    idx_option = safe_options.index(start_val) if start_val in safe_options else 0
 
                     new_val = st.selectbox(
                         "Select refined value",
                         safe_options,
                         index=idx_option,
-                        key=f"sel_{q}",
+                        key=f"sel_{uuid_input}_{q}",
                         label_visibility="collapsed"
                     )
                 else:
                     new_val = st.text_area(
                         "Type refined text",
-                        value=old_val,
+                        value=start_val,
                         height=NEW_TEXT_H,
-                        key=f"txt_{q}",
+                        key=f"txt_{uuid_input}_{q}",
                         label_visibility="collapsed"
                     )
 
@@ -545,21 +584,55 @@ with st.form("cleaning_form", clear_on_submit=False):
                 </div>
                 """, unsafe_allow_html=True)
 
-        # ✅ Track changes only if actually changed
+        # ✅ Track changes only if actually changed (None = drop a pending edit)
         if do_edit and normalize_val(new_val) != normalize_val(old_val):
-            changes.append([uuid_input, q, old_val, new_val, editor_name])
+            changes[(uuid_input, q)] = [uuid_input, q, old_val, new_val, editor_name]
+        else:
+            changes[(uuid_input, q)] = None
 
         st.markdown("</div>", unsafe_allow_html=True)
         st.markdown('<div class="divider"></div>', unsafe_allow_html=True)
 
-    submitted = st.form_submit_button("🚀 COMPLETE REFINEMENT & SAVE CHANGES", type="primary", use_container_width=True)
+    b1, b2 = st.columns(2)
+    with b1:
+        keep_next = st.form_submit_button(
+            "💾 Keep edits & next section ▶" if section < n_sections
+            else "💾 Keep edits & next record ▶" if review_mode == "Review queue"
+            else "💾 Keep edits",
+            use_container_width=True,
+        )
+    with b2:
+        submitted = st.form_submit_button("🚀 COMPLETE REFINEMENT & SAVE CHANGES", type="primary", use_container_width=True)
+
+if keep_next:
+    merge_pending(pending, changes)
+    if section < n_sections:
+        st.session_state["form_section_next"] = section + 1
+    elif review_mode == "Review queue" and queue_pos < len(queue) - 1:
+        st.session_state["queue_pos"] = queue_pos + 1
+    st.rerun()
+
+pending_records = len({u for u, _ in pending})
+st.caption(f"✏️ Pending edits (not saved yet): {len(pending)} in {pending_records} record(s)")
 
 # ---------------- SAVE ----------------
 if submitted:
-    if not changes:
+    merge_pending(pending, changes)
+    if not pending:
         st.warning("No changes detected.")
     else:
-        # ✅ Save once (safe, no duplication from per-field writes)
-        corr_ws.append_rows(changes, value_input_option="RAW")
-        st.success(f"✅ Saved: {len(changes)} change(s) | Editor: {editor_name}")
+        # ✅ Save once: all sections (and queued records) in batched append_rows calls
+        rows_to_save = list(pending.values())
+        # same owner on retry: a save that failed halfway continues instead of being refused
+        owner = st.session_state.setdefault("upload_owner", uuid.uuid4().hex)
+        try:
+            info = append_rows_resumable(corr_ws, rows_to_save, owner=owner)
+        except AppendInProgress as e:
+            st.warning(f"⏳ {e}. Try again once it has finished.")
+            st.stop()
+        invalidate(CORR_SHEET)
+        pending.clear()
+        st.success(
+            f"✅ Saved: {len(rows_to_save)} change(s) in {info['requests']} request(s) | Editor: {editor_name}"
+        )
         st.caption(f"Hidden columns applied from {HIDE_SHEET}: {len(hidden_labels)}")
@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import warnings
 
+from utils.chart_data import (
+    POINT_BUDGET, binned_crosstab, box_outliers, box_stats, downsample_line, histogram_2d, histogram_bins, sample_rows,
+)
+from utils.column_stats import describe_table, get_column_stats
+from utils.column_types import get_column_types, get_typed_frame
+from utils.correlation import get_correlation, top_pairs
+
 warnings.filterwarnings("ignore")
 
 # ---------------- OPTIONAL LIBS (NO-ERROR IMPORT) ----------------
@@ -36,14 +43,8 @@ except Exception:
 
 
 # ---------------- CONFIG ----------------
-json_path = r"D:\IOM_CBPAHA\iomcbpaha-37221bb23bb2.json"
-sheet_id = "1AHTDIC9eAAitXwlR6wL_ruiTfZx6ytIuzJrV7GkHjQE"
 DATA_SHEET = "Data_Set"
-
-scope = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive",
-]
+MATRIX_EXTRA_COLS = 3   # Scatter Matrix: X, Y + this many most-correlated numeric columns
 
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config("Data Visualization Suite | Liquid Glass", "🔮", layout="wide")
@@ -161,55 +162,6 @@ st.markdown(
 )
 
 # ---------------- HELPERS ----------------
-def load_df(ws):
-    v = ws.get_all_values()
-    return pd.DataFrame(v[1:], columns=v[0])
-
-def to_numeric(s: pd.Series) -> pd.Series:
-    if pd.api.types.is_numeric_dtype(s):
-        return s
-
-    s = s.astype(str)
-    s = s.replace({"": np.nan, "nan": np.nan, "None": np.nan, "NULL": np.nan})
-    s = s.str.replace(",", "", regex=False)
-    return pd.to_numeric(s, errors="coerce")
-
-def detect_column_type(series: pd.Series) -> str:
-    # اگر کل ستون عددی است
-    if pd.api.types.is_numeric_dtype(series):
-        return "numeric"
-
-    # اگر datetime است
-    if pd.api.types.is_datetime64_any_dtype(series):
-        return "date"
-
-    # تبدیل امن به string
-    s = series.dropna()
-    if s.empty:
-        return "unknown"
-
-    s = s.astype(str)
-
-    # تلاش برای تاریخ
-    try:
-        parsed = pd.to_datetime(s, errors="coerce")
-        if parsed.notna().mean() >= 0.7:
-            return "date"
-    except Exception:
-        pass
-
-    # تلاش برای عدد
-    num = pd.to_numeric(s.str.replace(",", "", regex=False), errors="coerce")
-    if num.notna().mean() >= 0.7:
-        return "numeric"
-
-    # categorical
-    if s.nunique() / len(s) <= 0.3:
-        return "categorical"
-
-    return "text"
-
-
 def chip_class(t: str) -> str:
     if t in ("numeric", "categorical", "text", "date", "unknown"):
         return t
@@ -334,34 +286,16 @@ st.markdown(
 )
 
 # ---------------- DATA LOADING ----------------
-
-# ---------------- DATA LOADING ----------------
-def get_gspread_client():
-    try:
-        use_secrets = "gcp_service_account" in st.secrets
-    except Exception:
-        use_secrets = False
-
-    if use_secrets:
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            st.secrets["gcp_service_account"], scope
-        )
-    else:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(json_path, scope)
-
-    return gspread.authorize(creds)
-
-
 try:
-    client = get_gspread_client()
-    ws = client.open_by_key(sheet_id).worksheet(DATA_SHEET)
-    df = load_df(ws)
+    # typed view (float / Categorical / datetime64), built once per Data_Set revision for all sessions
+    df = get_typed_frame(DATA_SHEET)
 
     if df.empty:
         st.error("Dataset is empty.")
         st.stop()
 
-    col_types = {c: detect_column_type(df[c]) for c in df.columns}
+    # sampled inference, cached per Data_Set revision (widget changes don't re-infer)
+    col_types = get_column_types(DATA_SHEET)
 
 except Exception as e:
     st.error(f"Error loading data: {e}")
@@ -467,23 +401,30 @@ with g3:
 
 selected_operations = basic_selected + advanced_selected + test_selected
 
-o1, o2, o3 = st.columns(3)
+o1, o2, o3, o4 = st.columns(4)
 with o1:
     apply_filters = st.checkbox("Drop missing (safe)", value=True, key="dropna_cb")
 with o2:
     show_trendline = st.checkbox("Show trendline (only numeric-numeric)", value=True, key="trend_cb")
 with o3:
     color_by = st.selectbox("Color By", ["None"] + [c for c in df.columns if c not in [x_col, y_col]], index=0, key="color_by")
+with o4:
+    point_budget = st.select_slider(
+        "Max points per chart",
+        [1_000, 2_000, 5_000, 10_000, 20_000, 50_000],
+        value=POINT_BUDGET,
+        key="point_budget",
+        help="Scatter / line / violin charts above this size are downsampled on the server.",
+    )
 
 st.markdown("</div>", unsafe_allow_html=True)
 
 # ---------------- DATA PREP ----------------
-data = df[[x_col, y_col]].copy()
-
-if x_type == "numeric":
-    data[x_col] = to_numeric(data[x_col])
-if y_type == "numeric":
-    data[y_col] = to_numeric(data[y_col])
+# columns are already typed -> plain selection, no per-rerun coercion.
+# X == Y (or a duplicated header) would give two same-named columns and data[col] a DataFrame
+data = df[list(dict.fromkeys([x_col, y_col]))]
+data = data.loc[:, ~data.columns.duplicated()]
+xy_cols = list(data.columns)
 
 if apply_filters:
     data = data.dropna(subset=[x_col, y_col])
@@ -501,17 +442,110 @@ if data.empty:
     st.warning("No data after filtering. Change columns or disable filters.")
     st.stop()
 
+# per-column statistics shared by the Statistics / Data Table / Advanced tabs
+filter_key = (x_col, y_col, apply_filters, top_n)
+
+
+def col_stats(col: str) -> dict:
+    return get_column_stats(DATA_SHEET, col, filter_key, data[col])
+
 # ---------------- CHART RENDERERS ----------------
+# Only aggregates (bins, grids, quantiles) or a bounded sample of points are sent to the browser.
+def is_num(t: str) -> bool:
+    return t in ("numeric", "date")
+
+
+def sampled_title(title: str, shown: int) -> str:
+    return title if shown >= len(data) else f"{title} (showing {shown:,} of {len(data):,} points)"
+
+
+def add_trendline(fig):
+    # OLS on all rows, not only the plotted sample
+    pair = data[xy_cols].dropna()
+    if len(pair) < 2:
+        return
+    xv = pair[x_col].to_numpy(dtype="float64")
+    slope, intercept = np.polyfit(xv, pair[y_col].to_numpy(dtype="float64"), 1)
+    xs = np.array([xv.min(), xv.max()])
+    fig.add_trace(go.Scatter(x=xs, y=slope * xs + intercept, mode="lines", name="OLS trendline"))
+
+
+def scatter_figure(title: str, trend: bool = False):
+    points = sample_rows(data, point_budget)
+    color = None if color_by == "None" else df.loc[points.index, color_by]
+    fig = px.scatter(points, x=x_col, y=y_col, color=color, title=sampled_title(title, len(points)))
+    if trend:
+        add_trendline(fig)
+    return fig
+
+
+def histogram_figure(s: pd.Series, title: str):
+    bins = histogram_bins(s)
+    width = bins["right"] - bins["left"]
+    if pd.api.types.is_datetime64_any_dtype(width):
+        width = width.dt.total_seconds() * 1000   # plotly date axes use ms
+    fig = px.bar(bins, x="center", y="count", title=title, labels={"center": s.name, "count": "count"})
+    fig.update_traces(width=width, marker_line_width=0)
+    return fig.update_layout(bargap=0)
+
+
+def box_trace(s: pd.Series, groups: pd.Series = None):
+    bs = box_stats(s, groups)
+    stats_kw = {k: bs[k] for k in ("q1", "median", "q3", "mean", "lowerfence", "upperfence")}
+    labels = bs["group"] if groups is not None else [s.name] * len(bs)
+    return go.Box(x=labels, name=s.name, **stats_kw)
+
+
+def outlier_trace(out: pd.DataFrame, horizontal: bool = False):
+    """Dots beyond the whiskers, as px.box draws them."""
+    pos, val = ("y", "x") if horizontal else ("x", "y")
+    return go.Scatter(
+        **{pos: out["group"], val: out["value"]}, mode="markers", name="outliers",
+        marker=dict(size=4, opacity=0.6), showlegend=False,
+    )
+
+
+def box_figure(num: str, cat: str = None):
+    groups = data[cat] if cat else None
+    out = box_outliers(data[num], groups, n=point_budget)
+    if not cat:
+        out["group"] = num
+    fig = go.Figure([box_trace(data[num], groups), outlier_trace(out)])
+    return fig.update_layout(title="Box Plot", xaxis_title=cat or "", yaxis_title=num)
+
+
+def distribution_figure(col: str):
+    """Histogram with a marginal box - both pre-aggregated."""
+    cs = col_stats(col)
+    box = go.Box(
+        y=[col], orientation="h", name=col,
+        **{k: [cs[k]] for k in ("q1", "median", "q3", "mean", "lowerfence", "upperfence")},
+    )
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.03)
+    fig.add_trace(box, row=1, col=1)
+    out = box_outliers(data[col], n=point_budget).assign(group=col)
+    fig.add_trace(outlier_trace(out, horizontal=True), row=1, col=1)
+    fig.add_trace(histogram_figure(data[col], "").data[0], row=2, col=1)
+    return fig.update_layout(title=f"Distribution of {col}", bargap=0, showlegend=False, template="plotly_dark")
+
+
+def grid_figure(kind: str, title: str):
+    xc, yc, z = histogram_2d(data[x_col], data[y_col])
+    trace = go.Heatmap(x=xc, y=yc, z=z) if kind == "heatmap" else go.Contour(x=xc, y=yc, z=z)
+    return go.Figure(trace).update_layout(title=title, xaxis_title=x_col, yaxis_title=y_col)
+
+
 def render_plotly(chart_name: str):
     # امن‌سازی trendline
-    trend = "ols" if (show_trendline and x_type == "numeric" and y_type == "numeric") else None
+    trend = show_trendline and x_type == "numeric" and y_type == "numeric"
 
     if chart_name == "Scatter Plot":
-        fig = px.scatter(data, x=x_col, y=y_col, color=None if color_by == "None" else color_by, trendline=trend, title=f"{y_col} vs {x_col}")
+        fig = scatter_figure(f"{y_col} vs {x_col}", trend=trend)
 
     elif chart_name == "Line Chart":
         # فقط اگر x قابل sort باشد
-        fig = px.line(data.sort_values(by=x_col), x=x_col, y=y_col, title=f"{y_col} over {x_col}")
+        points = downsample_line(data, x_col, y_col, point_budget)
+        fig = px.line(points, x=x_col, y=y_col, title=sampled_title(f"{y_col} over {x_col}", len(points)))
 
     elif chart_name == "Bar Chart":
         if y_type == "numeric" and x_type == "categorical":
@@ -524,33 +558,50 @@ def render_plotly(chart_name: str):
 
     elif chart_name == "Histogram":
         target = x_col if x_type == "numeric" else y_col
-        fig = px.histogram(data, x=target, title=f"Distribution of {target}")
+        if is_num(col_types[target]):
+            fig = histogram_figure(data[target], f"Distribution of {target}")
+        else:
+            counts = data[target].astype(str).value_counts().reset_index()
+            counts.columns = [target, "Count"]
+            fig = px.bar(counts, x=target, y="Count", title=f"Distribution of {target}")
 
     elif chart_name == "Box Plot":
         if x_type == "categorical" and y_type == "numeric":
-            fig = px.box(data, x=x_col, y=y_col, title="Box Plot")
+            fig = box_figure(y_col, x_col)
         elif x_type == "numeric" and y_type == "categorical":
-            fig = px.box(data, x=y_col, y=x_col, title="Box Plot")
+            fig = box_figure(x_col, y_col)
         else:
-            fig = px.box(data, y=y_col, title="Box Plot")
+            fig = box_figure(y_col)
 
     elif chart_name == "Violin Plot":
+        # KDE needs points: a bounded random sample keeps the shape
+        points = sample_rows(data, point_budget)
+        title = sampled_title("Violin Plot", len(points))
         if x_type == "categorical" and y_type == "numeric":
-            fig = px.violin(data, x=x_col, y=y_col, box=True, title="Violin Plot")
+            fig = px.violin(points, x=x_col, y=y_col, box=True, title=title)
         elif x_type == "numeric" and y_type == "categorical":
-            fig = px.violin(data, x=y_col, y=x_col, box=True, title="Violin Plot")
+            fig = px.violin(points, x=y_col, y=x_col, box=True, title=title)
         else:
-            fig = px.violin(data, y=y_col, box=True, title="Violin Plot")
+            fig = px.violin(points, y=y_col, box=True, title=title)
 
     elif chart_name == "Heatmap":
         if x_type == "categorical" and y_type == "categorical":
             ct = pd.crosstab(data[x_col].astype(str), data[y_col].astype(str))
             fig = px.imshow(ct, title=f"Heatmap: {x_col} × {y_col}", aspect="auto")
+        elif is_num(x_type) and is_num(y_type):
+            fig = grid_figure("heatmap", "Density Heatmap")
+        elif is_num(x_type):
+            fig = px.imshow(binned_crosstab(data[x_col], data[y_col]).T, title="Density Heatmap", aspect="auto")
+        elif is_num(y_type):
+            fig = px.imshow(binned_crosstab(data[y_col], data[x_col]), title="Density Heatmap", aspect="auto")
         else:
-            fig = px.density_heatmap(data, x=x_col, y=y_col, title="Density Heatmap")
+            fig = px.density_heatmap(sample_rows(data, point_budget), x=x_col, y=y_col, title="Density Heatmap")
 
     elif chart_name == "Density Contour":
-        fig = px.density_contour(data, x=x_col, y=y_col, title="Density Contour")
+        if is_num(x_type) and is_num(y_type):
+            fig = grid_figure("contour", "Density Contour")
+        else:
+            fig = px.density_contour(sample_rows(data, point_budget), x=x_col, y=y_col, title="Density Contour")
 
     elif chart_name == "Pie Chart":
         cat = x_col if x_type == "categorical" else y_col
@@ -571,11 +622,18 @@ def render_plotly(chart_name: str):
         fig = px.treemap(counts, path=[cat], values="Count", title=f"Treemap: {cat}")
 
     elif chart_name == "Scatter Matrix":
-        # فقط وقتی هر دو numeric هستند (اینجا فقط دو ستون داریم)
-        fig = px.scatter(data, x=x_col, y=y_col, title="Scatter Matrix (simplified)")
+        # X, Y + the numeric columns most correlated with them (from the cached matrix)
+        corr, _ = get_correlation(DATA_SHEET)
+        dims = [x_col, y_col]
+        if x_col in corr and y_col in corr:
+            related = corr[[x_col, y_col]].abs().max(axis=1).drop(dims, errors="ignore").dropna()
+            dims += related.sort_values(ascending=False).head(MATRIX_EXTRA_COLS).index.tolist()
+        points = sample_rows(df[dims].dropna(subset=[x_col, y_col]), point_budget)
+        fig = px.scatter_matrix(points, dimensions=dims, title=sampled_title("Scatter Matrix", len(points)))
+        fig.update_traces(diagonal_visible=False, marker=dict(size=3))
 
     else:
-        fig = px.scatter(data, x=x_col, y=y_col, title=f"{y_col} vs {x_col}")
+        fig = scatter_figure(f"{y_col} vs {x_col}")
 
     fig.update_layout(
         template="plotly_dark",
@@ -586,10 +644,24 @@ def render_plotly(chart_name: str):
     )
     return fig
 
+# (label, stats key) for the per-column operations
+STAT_OPS = {
+    "Sum": ("Sum", "sum"),
+    "Mean": ("Mean", "mean"),
+    "Median": ("Median", "median"),
+    "Min": ("Min", "min"),
+    "Max": ("Max", "max"),
+    "Std Deviation": ("Std", "std"),
+    "Skewness": ("Skew", "skew"),
+    "Kurtosis": ("Kurt", "kurt"),
+    "Range": ("Range", "range"),
+}
+
+
 def calculate_operations():
     results = {}
-    sX = data[x_col]
-    sY = data[y_col]
+    # one cached stats pass per column instead of one pandas pass per operation
+    numeric_cols = [c for c, t in ((x_col, x_type), (y_col, y_type)) if t == "numeric"]
 
     for op in selected_operations:
         try:
@@ -597,44 +669,26 @@ def calculate_operations():
                 results["Count(rows)"] = int(len(data))
 
             elif op == "Unique Count":
-                results[f"Unique({x_col})"] = int(sX.nunique(dropna=True))
-                results[f"Unique({y_col})"] = int(sY.nunique(dropna=True))
+                results[f"Unique({x_col})"] = int(col_stats(x_col)["unique"])
+                results[f"Unique({y_col})"] = int(col_stats(y_col)["unique"])
 
             elif op == "Mode":
-                results[f"Mode({x_col})"] = sX.mode(dropna=True).iloc[0] if not sX.mode(dropna=True).empty else "—"
-                results[f"Mode({y_col})"] = sY.mode(dropna=True).iloc[0] if not sY.mode(dropna=True).empty else "—"
-
-            elif op in ("Sum", "Mean", "Median", "Min", "Max", "Std Deviation", "Skewness", "Kurtosis", "Range"):
-                if x_type == "numeric":
-                    if op == "Sum": results[f"Sum({x_col})"] = float(sX.sum())
-                    if op == "Mean": results[f"Mean({x_col})"] = float(sX.mean())
-                    if op == "Median": results[f"Median({x_col})"] = float(sX.median())
-                    if op == "Min": results[f"Min({x_col})"] = float(sX.min())
-                    if op == "Max": results[f"Max({x_col})"] = float(sX.max())
-                    if op == "Std Deviation": results[f"Std({x_col})"] = float(sX.std())
-                    if op == "Skewness": results[f"Skew({x_col})"] = float(sX.skew())
-                    if op == "Kurtosis": results[f"Kurt({x_col})"] = float(sX.kurtosis())
-                    if op == "Range": results[f"Range({x_col})"] = float(sX.max() - sX.min())
-
-                if y_type == "numeric":
-                    if op == "Sum": results[f"Sum({y_col})"] = float(sY.sum())
-                    if op == "Mean": results[f"Mean({y_col})"] = float(sY.mean())
-                    if op == "Median": results[f"Median({y_col})"] = float(sY.median())
-                    if op == "Min": results[f"Min({y_col})"] = float(sY.min())
-                    if op == "Max": results[f"Max({y_col})"] = float(sY.max())
-                    if op == "Std Deviation": results[f"Std({y_col})"] = float(sY.std())
-                    if op == "Skewness": results[f"Skew({y_col})"] = float(sY.skew())
-                    if op == "Kurtosis": results[f"Kurt({y_col})"] = float(sY.kurtosis())
-                    if op == "Range": results[f"Range({y_col})"] = float(sY.max() - sY.min())
+                results[f"Mode({x_col})"] = col_stats(x_col)["mode"]
+                results[f"Mode({y_col})"] = col_stats(y_col)["mode"]
+
+            elif op in STAT_OPS:
+                label, key = STAT_OPS[op]
+                for col in numeric_cols:
+                    results[f"{label}({col})"] = float(col_stats(col)[key])
 
             elif op == "Correlation":
                 if x_type == "numeric" and y_type == "numeric":
-                    pair = data[[x_col, y_col]].dropna()
+                    pair = data[xy_cols].dropna()
                     results["Correlation(X,Y)"] = float(pair[x_col].corr(pair[y_col])) if len(pair) >= 2 else np.nan
 
             elif op == "Linear Regression":
                 if SCIPY_OK and x_type == "numeric" and y_type == "numeric":
-                    pair = data[[x_col, y_col]].dropna()
+                    pair = data[xy_cols].dropna()
                     if len(pair) >= 2:
                         slope, intercept, r_value, p_value, std_err = stats.linregress(pair[x_col], pair[y_col])
                         results["Slope"] = float(slope)
@@ -671,7 +725,7 @@ with tab1:
             chart_name = selected_chart.replace("Altair Charts: ", "").strip()
             # 최소 و امن: Scatter/Bar/Line
             if chart_name == "Altair: Scatter" and x_type == "numeric" and y_type == "numeric":
-                ch = alt.Chart(data).mark_circle().encode(x=x_col, y=y_col, tooltip=[x_col, y_col]).interactive()
+                ch = alt.Chart(sample_rows(data, point_budget)).mark_circle().encode(x=x_col, y=y_col, tooltip=[x_col, y_col]).interactive()
                 st.altair_chart(ch, use_container_width=True)
             elif chart_name == "Altair: Bar" and x_type == "categorical" and y_type == "numeric":
                 agg = data.groupby(x_col)[y_col].mean().reset_index()
@@ -750,21 +804,47 @@ if output_mode in ["Multi-Chart Dashboard", "Full Analysis"]:
         st.dataframe(data.head(200), use_container_width=True, height=420)
 
         st.markdown("**Data Summary**")
-        st.dataframe(data.describe(include="all").transpose().round(3), use_container_width=True)
+        summary = describe_table({c: col_stats(c) for c in dict.fromkeys([x_col, y_col])})
+        st.dataframe(summary.round(3), use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
     with tab4:
         st.markdown('<div class="glass-card">', unsafe_allow_html=True)
         # Advanced: فقط چیزهای امن
         if x_type == "numeric":
-            st.plotly_chart(px.histogram(data, x=x_col, marginal="box", title=f"Distribution of {x_col}").update_layout(template="plotly_dark"), use_container_width=True)
+            st.plotly_chart(distribution_figure(x_col), use_container_width=True)
         if y_type == "numeric":
-            st.plotly_chart(px.histogram(data, x=y_col, marginal="box", title=f"Distribution of {y_col}").update_layout(template="plotly_dark"), use_container_width=True)
+            st.plotly_chart(distribution_figure(y_col), use_container_width=True)
 
         if x_type == "numeric" and y_type == "numeric":
-            corr = data[[x_col, y_col]].dropna().corr()
+            corr = data[xy_cols].dropna().corr()
             st.plotly_chart(px.imshow(corr, text_auto=True, aspect="auto", title="Correlation Matrix").update_layout(template="plotly_dark"), use_container_width=True)
 
+        # Whole-dataset profiling: every numeric column against every other
+        st.markdown("**🧮 All numeric columns**")
+        if st.toggle("Profile all numeric columns", value=False, key="profile_all"):
+            with st.spinner("Computing correlation matrix..."):
+                full_corr, pair_rows = get_correlation(DATA_SHEET)
+            if full_corr.shape[0] < 2:
+                st.info("Fewer than two numeric columns in the dataset.")
+            else:
+                st.caption(f"{full_corr.shape[0]} numeric columns • pairwise-complete rows • cached until the sheet changes")
+                fig = px.imshow(
+                    full_corr, zmin=-1, zmax=1, color_continuous_scale="RdBu_r", aspect="auto",
+                    title="Correlation Matrix (all numeric columns)",
+                )
+                fig.update_layout(template="plotly_dark", height=min(1400, 300 + 12 * full_corr.shape[0]))
+                st.plotly_chart(fig, use_container_width=True)
+
+                min_r = st.slider("Minimum |r|", 0.0, 1.0, 0.5, 0.05, key="min_abs_r")
+                st.dataframe(top_pairs(full_corr, pair_rows, k=200, min_abs=min_r).round(4), use_container_width=True, height=320)
+                st.download_button(
+                    "📥 Download Correlation Matrix",
+                    data=full_corr.round(6).to_csv(),
+                    file_name="correlation_matrix.csv",
+                    mime="text/csv",
+                )
+
         st.markdown("</div>", unsafe_allow_html=True)
 
 # ---------------- FOOTER ----------------
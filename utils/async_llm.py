@@ -0,0 +1,198 @@
+"""
+asyncio runner for the batched OpenAI translator (utils.llm_translate).
+
+Batches run concurrently on an AsyncOpenAI client behind an adaptive limit:
+it grows by one after a full round of successes, halves on a 429, and waits
+out the reset time when the server says so (retry-after / x-ratelimit-*
+headers). Every request has its own timeout, and progress goes through a
+single callback.
+"""
+import asyncio
+import re
+import time
+
+from utils.llm_translate import (
+    BATCH_TOKEN_BUDGET, MAX_SEGMENTS, RATE_RETRIES, BatchMismatch, build_request, is_rate_limit, pack_batches,
+    read_reply,
+)
+
+# ---------------- CONFIG ----------------
+START_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+REQUEST_TIMEOUT = 60.0   # seconds per request
+TIMEOUT_RETRIES = 2
+LOW_REMAINING = 1        # x-ratelimit-remaining-* at or below this -> pause until the reset
+
+
+# ---------------- RATE-LIMIT HEADERS ----------------
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value) -> float:
+    """'20ms', '1s', '6m0s', '1.5' -> seconds (None if unreadable)."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    return sum(float(n) * _UNIT[u] for n, u in parts) if parts else None
+
+
+def server_wait(headers) -> float:
+    """Seconds the server asks us to wait before the next request (0 if it doesn't say)."""
+    if not headers:
+        return 0.0
+    if headers.get("retry-after-ms") is not None:
+        return (parse_duration(headers.get("retry-after-ms")) or 0.0) / 1000.0
+    waits = [parse_duration(headers.get("retry-after"))]
+    for kind in ("requests", "tokens"):
+        remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+        if remaining is not None and str(remaining).isdigit() and int(remaining) <= LOW_REMAINING:
+            waits.append(parse_duration(headers.get(f"x-ratelimit-reset-{kind}")))
+    return max([w for w in waits if w is not None], default=0.0)
+
+
+def _headers(exc: Exception):
+    response = getattr(exc, "response", None)
+    return getattr(response, "headers", None)
+
+
+def is_timeout(exc: Exception) -> bool:
+    return isinstance(exc, asyncio.TimeoutError) or type(exc).__name__ == "APITimeoutError"
+
+
+# ---------------- ADAPTIVE LIMIT ----------------
+class AdaptiveConcurrency:
+    """
+    Semaphore with a moving bound: +1 after `limit` successes in a row (additive increase),
+    halved on a 429 (multiplicative decrease); server-requested waits block all new requests.
+    """
+
+    def __init__(self, start: int = START_CONCURRENCY, maximum: int = MAX_CONCURRENCY, minimum: int = 1):
+        self.minimum, self.maximum = minimum, maximum
+        self.limit = max(minimum, min(start, maximum))
+        self.peak = self.limit
+        self._active = 0
+        self._streak = 0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait <= 0 and self._active < self.limit:
+                    self._active += 1
+                    return
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout=wait if wait > 0 else None)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, headers=None, rate_limited: bool = False):
+        async with self._cond:
+            self._active -= 1
+            if rate_limited:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._streak = 0
+            else:
+                self._streak += 1
+                if self._streak >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self.peak = max(self.peak, self.limit)
+                    self._streak = 0
+            wait = server_wait(headers) or (1.0 if rate_limited else 0.0)
+            if wait:
+                self._resume_at = max(self._resume_at, time.monotonic() + wait)
+            self._cond.notify_all()
+
+
+# ---------------- RUNNER ----------------
+async def translate_segments_async(client, model: str, texts: list, budget: int = BATCH_TOKEN_BUDGET,
+                                   max_segments: int = MAX_SEGMENTS, concurrency: int = MAX_CONCURRENCY,
+                                   timeout: float = REQUEST_TIMEOUT, progress=None):
+    """
+    Translates `texts` in token-budgeted batches (llm_translate.pack_batches) that run
+    concurrently; a batch with an incomplete / malformed reply is bisected. Returns
+    (translations, info); translations[i] is None where the segment could not be translated.
+    """
+    results = [None] * len(texts)
+    info = {"requests": 0, "batches": 0, "bisections": 0, "failed": 0, "rate_limited": 0, "timeouts": 0}
+    limiter = AdaptiveConcurrency(start=min(START_CONCURRENCY, concurrency), maximum=concurrency)
+    done = 0
+
+    def report(n: int):
+        nonlocal done
+        done += n
+        if progress:
+            progress(done, len(texts))
+
+    def fail(idx: list, error: str):
+        info["failed"] += len(idx)
+        info["error"] = error
+        report(len(idx))
+
+    async def request(idx: list) -> list:
+        kwargs, ids = build_request(model, [texts[i] for i in idx])
+        await limiter.acquire()
+        info["requests"] += 1
+        try:
+            raw = await asyncio.wait_for(client.chat.completions.with_raw_response.create(**kwargs), timeout)
+        except Exception as e:
+            await limiter.release(_headers(e), rate_limited=is_rate_limit(e))
+            raise
+        await limiter.release(raw.headers)
+        return read_reply(raw.parse(), ids)
+
+    async def run(idx: list):
+        rate_tries = timeouts = 0
+        while True:
+            try:
+                translated = await request(idx)
+            except BatchMismatch:
+                break
+            except Exception as e:
+                if is_rate_limit(e) and rate_tries < RATE_RETRIES:
+                    rate_tries += 1
+                    info["rate_limited"] += 1
+                    continue
+                if is_timeout(e) and timeouts < TIMEOUT_RETRIES:
+                    timeouts += 1
+                    info["timeouts"] += 1
+                    continue
+                return fail(idx, "request timed out" if is_timeout(e) else str(e))
+            for i, t in zip(idx, translated):
+                results[i] = t
+            return report(len(idx))
+
+        if len(idx) == 1:
+            return fail(idx, "reply did not match the request")
+        # incomplete / malformed reply: both halves retried concurrently
+        info["bisections"] += 1
+        mid = len(idx) // 2
+        await asyncio.gather(run(idx[:mid]), run(idx[mid:]))
+
+    batches = pack_batches(texts, budget, max_segments)
+    info["batches"] = len(batches)
+    await asyncio.gather(*(run(b) for b in batches))
+    info["peak_concurrency"] = limiter.peak
+    return results, info
+
+
+def translate_concurrent(make_client, model: str, texts: list, **kwargs):
+    """
+    Blocking entry point for Streamlit pages: runs translate_segments_async on a fresh
+    event loop with a client from make_client() (e.g. lambda: AsyncOpenAI(...)) and closes it.
+    """
+    async def main():
+        client = make_client()
+        try:
+            return await translate_segments_async(client, model, texts, **kwargs)
+        finally:
+            await client.close()
+
+    return asyncio.run(main())
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.detection import PERSOARABIC_RE, factorize_grid
+from utils.sheets import DATA_TTL, get_version, load_df, sheet_revision
+
+# empty-like answers (compared stripped + lowercased)
+NA_TOKENS = ["n/a", "na", "null", "none", "nan", "-", "--"]
+UUID_COL = "_uuid"
+
+
+# ---------------- KERNEL ----------------
+def attention_values(values) -> np.ndarray:
+    """needs_attention for an array of values: empty / NA token / Dari-Pashto script."""
+    s = pd.Series(values, dtype=object).map(lambda x: "" if x is None else x).astype(str).str.strip()
+    return (
+        (s == "").to_numpy(dtype=bool)
+        | s.str.lower().isin(NA_TOKENS).to_numpy(dtype=bool)
+        | s.str.contains(PERSOARABIC_RE).to_numpy(dtype=bool)
+    )
+
+
+def attention_mask(df: pd.DataFrame) -> np.ndarray:
+    """rows x columns bool: each distinct value is checked once, then broadcast to the grid."""
+    codes, uniques = factorize_grid(df)
+    flags = attention_values(uniques)
+    flags[-1] = True   # NaN / None cell -> empty
+    return flags[codes]
+
+
+# ---------------- DATASET MATRIX ----------------
+def build_attention(df: pd.DataFrame) -> dict:
+    """
+    Compact attention matrix for the whole dataset: one bit per (record, question),
+    packed per row with np.packbits.
+    """
+    keep = df.columns != UUID_COL   # positional: df[cols] would repeat duplicated headers
+    cols = list(df.columns[keep])
+    mask = attention_mask(df.loc[:, keep]) if cols else np.zeros((len(df), 0), dtype=bool)
+    return {
+        "uuids": df[UUID_COL].astype(str).to_numpy(dtype=object),
+        "columns": cols,
+        "bits": np.packbits(mask, axis=1),
+    }
+
+
+def unpack(att: dict, columns=None) -> np.ndarray:
+    mask = np.unpackbits(att["bits"], axis=1, count=len(att["columns"])).astype(bool)
+    if columns is None:
+        return mask
+    # duplicate headers: every column carrying a requested name is kept (once)
+    pos = pd.Index(att["columns"]).get_indexer_for(list(dict.fromkeys(columns)))
+    return mask[:, pos[pos >= 0]]
+
+
+def record_attention(att: dict, uuid, columns) -> np.ndarray:
+    """
+    Flags of one record for `columns` (in that order) from the packed matrix, or None if the
+    record is not in it. The n-th occurrence of a duplicated header maps to its n-th column.
+    """
+    hits = np.flatnonzero(att["uuids"] == str(uuid))
+    if not len(hits):
+        return None
+    flags = np.unpackbits(att["bits"][hits[0]], count=len(att["columns"])).astype(bool)
+    where = {}
+    for i, c in enumerate(att["columns"]):
+        where.setdefault(c, []).append(i)
+    seen = {}
+    out = np.zeros(len(columns), dtype=bool)
+    for j, c in enumerate(columns):
+        k = seen.get(c, 0)
+        seen[c] = k + 1
+        pos = where.get(c, [])
+        if k >= len(pos):
+            return None
+        out[j] = flags[pos[k]]
+    return out
+
+
+def ranked_records(att: dict, columns=None) -> pd.DataFrame:
+    """Records with at least one flagged field, most flags first (ties keep sheet order)."""
+    counts = unpack(att, columns).sum(axis=1)
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] > 0]
+    out = pd.DataFrame({UUID_COL: att["uuids"][order], "fields_needing_attention": counts[order]})
+    return out.drop_duplicates(UUID_COL).reset_index(drop=True)
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL, max_entries=4)
+def _cached_attention(name: str, version: int, revision: str) -> dict:
+    return build_attention(load_df(name))
+
+
+def get_attention(name: str) -> dict:
+    """Dataset attention matrix, computed once per (version, revision) and shared by all sessions."""
+    return _cached_attention(name, get_version(name), sheet_revision(name))
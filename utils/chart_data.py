@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# ---------------- CONFIG ----------------
+POINT_BUDGET = 5_000       # max raw points sent to the browser per chart (scatter / line / violin)
+MAX_HIST_BINS = 200
+GRID_BINS = 50             # per axis for density heatmaps / contours
+
+
+def _as_float(s: pd.Series) -> np.ndarray:
+    """float64 view of a numeric / datetime column (datetimes as ns since epoch)."""
+    if pd.api.types.is_datetime64_any_dtype(s):
+        out = s.to_numpy(dtype="datetime64[ns]").astype("int64").astype("float64")
+        out[s.isna().to_numpy()] = np.nan
+        return out
+    return s.to_numpy(dtype="float64", na_value=np.nan)
+
+
+# ---------------- DOWNSAMPLING ----------------
+def sample_rows(df: pd.DataFrame, n: int = POINT_BUDGET, seed: int = 0) -> pd.DataFrame:
+    """Uniform random subset of at most n rows (original order kept)."""
+    if len(df) <= n:
+        return df
+    return df.sample(n, random_state=seed).sort_index()
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: positions of n points that keep the visual shape
+    of a line (x sorted ascending). First and last points are always kept.
+    """
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)   # n-2 inner buckets
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else size)
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample_line(df: pd.DataFrame, x_col: str, y_col: str, n: int = POINT_BUDGET) -> pd.DataFrame:
+    """Sorted by x; LTTB when both axes are numeric / datetime, evenly spaced rows otherwise."""
+    df = df.sort_values(by=x_col)
+    if len(df) <= n:
+        return df
+    x, y = df[x_col], df[y_col]
+    numeric = all(
+        pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s) for s in (x, y)
+    )
+    if numeric:
+        xv, yv = _as_float(x), _as_float(y)
+        ok = ~(np.isnan(xv) | np.isnan(yv))
+        if ok.all():
+            return df.iloc[lttb_indices(xv, yv, n)]
+    return df.iloc[np.linspace(0, len(df) - 1, n).astype(np.int64)]
+
+
+# ---------------- AGGREGATES ----------------
+def histogram_bins(s: pd.Series, bins=None) -> pd.DataFrame:
+    """Pre-binned histogram: left / right / center / count per bin ('auto' bins, capped)."""
+    v = _as_float(s)
+    v = v[~np.isnan(v)]
+    if v.size == 0:
+        return pd.DataFrame(columns=["left", "right", "center", "count"])
+    edges = np.histogram_bin_edges(v, bins=bins or "auto")
+    if len(edges) - 1 > MAX_HIST_BINS:
+        edges = np.histogram_bin_edges(v, bins=MAX_HIST_BINS)
+    counts, edges = np.histogram(v, bins=edges)
+    out = pd.DataFrame({"left": edges[:-1], "right": edges[1:], "count": counts})
+    out["center"] = (out["left"] + out["right"]) / 2
+    if pd.api.types.is_datetime64_any_dtype(s):
+        for c in ("left", "right", "center"):
+            out[c] = pd.to_datetime(out[c].astype("int64"), unit="ns")
+    return out
+
+
+def histogram_2d(x: pd.Series, y: pd.Series, bins: int = GRID_BINS):
+    """(x_centers, y_centers, counts[y, x]) of a numeric pair, NaNs dropped."""
+    xv, yv = _as_float(x), _as_float(y)
+    ok = ~(np.isnan(xv) | np.isnan(yv))
+    counts, xe, ye = np.histogram2d(xv[ok], yv[ok], bins=bins)
+    centers = []
+    for s, e in ((x, xe), (y, ye)):
+        c = (e[:-1] + e[1:]) / 2
+        if pd.api.types.is_datetime64_any_dtype(s):
+            c = pd.to_datetime(c.astype("int64"), unit="ns")
+        centers.append(c)
+    return centers[0], centers[1], counts.T
+
+
+def binned_crosstab(num: pd.Series, cat: pd.Series, bins: int = GRID_BINS) -> pd.DataFrame:
+    """Counts of a numeric column (binned, labelled by bin center) against a categorical one."""
+    v = pd.Series(_as_float(num), index=num.index)
+    binned = pd.cut(v, bins=min(bins, max(1, v.nunique())))
+    labels = binned.map(lambda b: round(b.mid, 4) if pd.notna(b) else None)
+    return pd.crosstab(labels, cat.astype(str))
+
+
+def _box_frame(values: pd.Series, groups: pd.Series = None):
+    """(non-NA values with their group, per-group quartiles, in-fence mask)"""
+    v = pd.Series(_as_float(values), index=values.index)
+    g = groups.astype(str) if groups is not None else pd.Series("all", index=values.index)
+    frame = pd.DataFrame({"v": v, "g": g}).dropna(subset=["v"])
+    q = frame.groupby("g", sort=True)["v"].quantile([0.25, 0.5, 0.75]).unstack()
+    q.columns = ["q1", "median", "q3"]
+    iqr = q["q3"] - q["q1"]
+    lo = frame["g"].map(q["q1"] - 1.5 * iqr)
+    hi = frame["g"].map(q["q3"] + 1.5 * iqr)
+    return frame, q, (frame["v"] >= lo) & (frame["v"] <= hi)
+
+
+def box_stats(values: pd.Series, groups: pd.Series = None) -> pd.DataFrame:
+    """
+    Per group: q1 / median / q3 / mean / Tukey fences (most extreme values within 1.5 IQR) / n,
+    i.e. everything plotly needs to draw a box without the raw points.
+    """
+    frame, q, inside = _box_frame(values, groups)
+    if frame.empty:
+        return pd.DataFrame(columns=["group", "q1", "median", "q3", "mean", "lowerfence", "upperfence", "n"])
+
+    grouped = frame.groupby("g", sort=True)["v"]
+    within = frame[inside].groupby("g")["v"]
+    out = q.assign(
+        mean=grouped.mean(),
+        lowerfence=within.min(),
+        upperfence=within.max(),
+        n=grouped.size(),
+    )
+    return out.rename_axis("group").reset_index()
+
+
+def box_outliers(values: pd.Series, groups: pd.Series = None, n: int = POINT_BUDGET) -> pd.DataFrame:
+    """Points outside the Tukey fences (what px.box draws as dots): group / value, at most n rows."""
+    frame, _, inside = _box_frame(values, groups)
+    out = sample_rows(frame[~inside], n)
+    return pd.DataFrame({"group": out["g"].to_numpy(), "value": out["v"].to_numpy()})
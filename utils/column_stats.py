@@ -0,0 +1,152 @@
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.sheets import DATA_TTL, get_version, sheet_revision
+
+# ---------------- CONFIG ----------------
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+# ---------------- KERNEL ----------------
+def _quantile(sorted_vals: np.ndarray, q: float) -> float:
+    # linear interpolation, same as Series.quantile / np.quantile
+    pos = (len(sorted_vals) - 1) * q
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return float(sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo))
+
+
+def _runs(sorted_vals: np.ndarray):
+    """Start index and length of each run of equal values in a sorted array."""
+    starts = np.flatnonzero(np.r_[True, sorted_vals[1:] != sorted_vals[:-1]])
+    return starts, np.diff(np.r_[starts, len(sorted_vals)])
+
+
+def _numeric_stats(s: pd.Series) -> dict:
+    a = s.to_numpy(dtype="float64", na_value=np.nan)
+    a = np.sort(a[~np.isnan(a)])
+    n = len(a)
+    out = {"count": n, "missing": len(s) - n, "sum": float(a.sum()), "numeric": True}
+    if n == 0:
+        empty = dict.fromkeys(
+            ["freq", "mean", "std", "skew", "kurt", "min", "q1", "median", "q3", "max", "range", "lowerfence",
+             "upperfence"], np.nan,
+        )
+        return out | empty | {"unique": 0, "mode": "—"}
+
+    # order statistics, distinct values and mode from the one sorted copy
+    starts, lengths = _runs(a)
+    top = int(np.argmax(lengths))   # first of the tied runs = smallest value, like Series.mode().iloc[0]
+    q1, median, q3 = (_quantile(a, q) for q in QUANTILES)
+    iqr = q3 - q1
+    lo = int(np.searchsorted(a, q1 - 1.5 * iqr, side="left"))
+    hi = int(np.searchsorted(a, q3 + 1.5 * iqr, side="right")) - 1
+
+    # central moments (pandas' bias-corrected std / skew / kurtosis)
+    mean = out["sum"] / n
+    d = a - mean
+    d2 = d * d
+    m2, m3, m4 = d2.sum(), (d2 * d).sum(), (d2 * d2).sum()
+    if abs(m2) < 1e-14 * max(1.0, mean * mean) * n:
+        m2 = 0.0
+    std = math.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+    if n < 3:
+        skew = np.nan
+    else:
+        skew = 0.0 if m2 == 0 else (n * (n - 1) ** 0.5 / (n - 2)) * (m3 / m2 ** 1.5)
+    if n < 4:
+        kurt = np.nan
+    elif m2 == 0:
+        kurt = 0.0
+    else:
+        kurt = (n * (n + 1) * (n - 1) * m4) / ((n - 2) * (n - 3) * m2 ** 2) - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+
+    return out | {
+        "unique": len(starts),
+        "mode": float(a[starts[top]]),
+        "freq": int(lengths[top]),
+        "mean": float(mean),
+        "std": float(std),
+        "skew": float(skew),
+        "kurt": float(kurt),
+        "min": float(a[0]),
+        "q1": q1,
+        "median": median,
+        "q3": q3,
+        "max": float(a[-1]),
+        "range": float(a[-1] - a[0]),
+        "lowerfence": float(a[lo]),
+        "upperfence": float(a[hi]),
+    }
+
+
+def _category_stats(s: pd.Series) -> dict:
+    codes, uniques = pd.factorize(s, use_na_sentinel=True)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    n = int(counts.sum())
+    out = {"count": n, "missing": len(s) - n, "unique": len(uniques), "numeric": False}
+    if n == 0:
+        return out | {"mode": "—", "freq": np.nan, "min": np.nan, "max": np.nan}
+    tied = np.flatnonzero(counts == counts.max())
+    # raw values: an unordered Categorical has no min / sort order of its own
+    values = np.asarray(uniques, dtype=object)
+    ordered = pd.Series(values).sort_values()
+    return out | {
+        "mode": pd.Series(values[tied]).min(),   # smallest tied value, like Series.mode().iloc[0]
+        "freq": int(counts.max()),
+        "min": ordered.iloc[0],
+        "max": ordered.iloc[-1],
+    }
+
+
+def column_stats(s: pd.Series) -> dict:
+    """
+    Everything the Statistics / Data Table / Advanced tabs show for one column:
+    count, missing, unique, mode (+freq) and, for numeric columns, sum, mean,
+    std, skew, kurtosis, min / quartiles / max, range and Tukey fences.
+    A DataFrame (a duplicated column name) is reduced to its first column.
+    """
+    if isinstance(s, pd.DataFrame):
+        s = s.iloc[:, 0]
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return _numeric_stats(s)
+    return _category_stats(s)
+
+
+def describe_table(stats: dict) -> pd.DataFrame:
+    """{column: column_stats} -> the same layout as DataFrame.describe(include="all").T"""
+    rows = {
+        col: {
+            "count": cs["count"],
+            "unique": cs["unique"],
+            "top": cs["mode"],
+            "freq": cs["freq"],
+            "mean": cs.get("mean", np.nan),
+            "std": cs.get("std", np.nan),
+            "min": cs["min"],
+            "25%": cs.get("q1", np.nan),
+            "50%": cs.get("median", np.nan),
+            "75%": cs.get("q3", np.nan),
+            "max": cs["max"],
+        }
+        for col, cs in stats.items()
+    }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+# ---------------- CACHE ----------------
+@st.cache_data(show_spinner=False, ttl=DATA_TTL, max_entries=64)
+def _cached_stats(name: str, version: int, revision: str, column: str, filter_key: tuple, _s: pd.Series) -> dict:
+    return column_stats(_s)
+
+
+def get_column_stats(name: str, column: str, filter_key: tuple, s: pd.Series) -> dict:
+    """
+    column_stats for `s` (= column of sheet `name` after the page's filters),
+    memoized by (column, filter state, sheet version/revision) so tab switches
+    and reruns with the same selection are free.
+    """
+    return _cached_stats(name, get_version(name), sheet_revision(name), column, filter_key, _s=s)
@@ -0,0 +1,161 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.sheets import DATA_TTL, fetch_df, get_version, sheet_revision
+
+# ---------------- CONFIG ----------------
+TYPE_THRESHOLD = 0.7     # share of parseable values needed for date / numeric
+CATEGORICAL_RATIO = 0.3  # nunique / non-null count at or below this -> categorical
+TYPE_SAMPLE = 400        # values parsed before deciding (or escalating to the full column)
+TYPE_MEMO_MAX = 4096     # column-hash -> type entries kept per process
+
+
+# ---------------- SAMPLED INFERENCE ----------------
+def stratified_sample(s: pd.Series, n: int) -> pd.Series:
+    """n values spread evenly over the column (one per stratum), first value always included."""
+    if len(s) <= n:
+        return s
+    pos = np.linspace(0, len(s) - 1, n).round().astype(np.int64)
+    return s.iloc[np.unique(pos)]
+
+
+def _date_share(s: pd.Series) -> float:
+    try:
+        return float(pd.to_datetime(s, errors="coerce").notna().mean())
+    except Exception:
+        return 0.0
+
+
+def _numeric_share(s: pd.Series) -> float:
+    return float(pd.to_numeric(s.str.replace(",", "", regex=False), errors="coerce").notna().mean())
+
+
+def _passes(share_fn, s: pd.Series, sample: pd.Series) -> bool:
+    """
+    share >= TYPE_THRESHOLD? Decided on the sample when it is clearly above / below
+    (binomial margin), otherwise on the full column.
+    """
+    p = share_fn(sample)
+    if len(sample) < len(s):
+        margin = 2.5 * math.sqrt(max(p * (1 - p), 0.01) / len(sample))
+        if p - margin >= TYPE_THRESHOLD:
+            return True
+        if p + margin < TYPE_THRESHOLD:
+            return False
+        p = share_fn(s)
+    return p >= TYPE_THRESHOLD
+
+
+def infer_column_type(series: pd.Series, sample_size: int = TYPE_SAMPLE) -> str:
+    """Same rules as the old detect_column_type (date, numeric, categorical, text) on a sample first."""
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "date"
+
+    s = series.dropna()
+    if s.empty:
+        return "unknown"
+    s = s.astype(str)
+    sample = stratified_sample(s, sample_size)
+
+    if _passes(_date_share, s, sample):
+        return "date"
+    if _passes(_numeric_share, s, sample):
+        return "numeric"
+    if s.nunique() / len(s) <= CATEGORICAL_RATIO:
+        return "categorical"
+    return "text"
+
+
+# ---------------- MEMO ----------------
+def column_hash(series: pd.Series) -> str:
+    """Content hash of a column (values + order); each distinct value is hashed once."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    hashed = pd.util.hash_array(np.asarray(uniques, dtype=object))
+    h = np.where(codes < 0, np.uint64(0), hashed[np.maximum(codes, 0)] if len(hashed) else np.uint64(0))
+    return hashlib.sha1(np.ascontiguousarray(h, dtype=np.uint64).tobytes()).hexdigest()
+
+
+@st.cache_resource(show_spinner=False)
+def _type_memo() -> dict:
+    return {"lock": threading.Lock(), "types": OrderedDict()}
+
+
+def infer_types(df: pd.DataFrame) -> dict:
+    """{column: type}; columns whose content did not change since an earlier revision are not re-parsed."""
+    memo = _type_memo()
+    out = {}
+    for j, c in enumerate(df.columns):
+        col = df.iloc[:, j]
+        key = (str(col.dtype), column_hash(col))
+        with memo["lock"]:
+            t = memo["types"].get(key)
+        if t is None:
+            t = infer_column_type(col)
+            with memo["lock"]:
+                memo["types"][key] = t
+                while len(memo["types"]) > TYPE_MEMO_MAX:
+                    memo["types"].popitem(last=False)
+        out[c] = t
+    return out
+
+
+def get_column_types(name: str) -> dict:
+    """Column types of a worksheet, inferred once per (version, revision) for all sessions."""
+    return dict(_cached_typed(name, get_version(name), sheet_revision(name))[1])
+
+
+# ---------------- TYPED FRAME ----------------
+def coerce_numeric(s: pd.Series) -> pd.Series:
+    """Text -> float64 (thousands separators removed, empty / NULL-like -> NaN)."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64")
+    s = s.astype(str)
+    s = s.replace({"": np.nan, "nan": np.nan, "None": np.nan, "NULL": np.nan})
+    s = s.str.replace(",", "", regex=False)
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+def typed_column(s: pd.Series, col_type: str) -> pd.Series:
+    if col_type == "numeric":
+        return coerce_numeric(s)
+    if col_type == "date":
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return s
+        return pd.to_datetime(s.replace({"": None}), errors="coerce")
+    if col_type == "categorical":
+        return s.astype("category")
+    return s
+
+
+def build_typed_frame(df: pd.DataFrame, types: dict) -> pd.DataFrame:
+    """
+    Data_Set with every column coerced once: numeric -> float64, date -> datetime64,
+    categorical -> Categorical (codes + categories), text / unknown unchanged.
+    """
+    return pd.DataFrame(
+        {j: typed_column(df.iloc[:, j], types.get(c, "text")) for j, c in enumerate(df.columns)}
+    ).set_axis(df.columns, axis=1)
+
+
+@st.cache_resource(show_spinner=False, ttl=DATA_TTL, max_entries=2)
+def _cached_typed(name: str, version: int, revision: str) -> tuple:
+    # built from an uncached read: only the typed frame stays in memory, not the object grid too
+    raw = fetch_df(name, version, revision)
+    types = infer_types(raw)
+    return build_typed_frame(raw, types), types
+
+
+def get_typed_frame(name: str) -> pd.DataFrame:
+    """
+    Typed view of a worksheet, built once per (version, revision) and shared (not copied)
+    across sessions - treat it as read-only; column selections are copy-on-write.
+    """
+    return _cached_typed(name, get_version(name), sheet_revision(name))[0]
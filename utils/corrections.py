@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+
+# ---------------- INDEX ----------------
+def build_uuid_index(data_df: pd.DataFrame, uuid_col: str) -> pd.DataFrame:
+    """
+    One pass over Data_Set: _uuid (stripped) -> row position.
+    Duplicated _uuid values keep one row per position (all of them get updated).
+    """
+    keys = data_df[uuid_col].astype(str).str.strip()
+    return pd.DataFrame({"_uuid": keys.to_numpy(dtype=object), "_pos": np.arange(len(keys))})
+
+
+# ---------------- APPLY ENGINE ----------------
+def apply_corrections(data_df: pd.DataFrame, corr_view: pd.DataFrame, uuid_col: str, skip_empty: bool = True) -> dict:
+    """
+    Batch version of the old per-row apply loop.
+
+    - Looks every correction up in a single _uuid index (merge) instead of
+      scanning the whole Data_Set for each correction.
+    - Groups corrections by Question and writes each column once.
+    - data_df is updated in place (same as before).
+
+    Returns dict with change_log / errors / applied_cells, identical to what
+    the iterrows loop produced (same order, same messages), plus
+    changed_cells: (row_pos, col_pos) of every cell whose value really changed
+    (used for diff writes back to the sheet).
+    """
+    corr = pd.DataFrame({
+        "_uuid": corr_view["_uuid"].astype(str).str.strip().to_numpy(dtype=object),
+        "Question": corr_view["Question"].astype(str).str.strip().to_numpy(dtype=object),
+        "new_value": (
+            corr_view["new_value"].astype(str).str.strip().to_numpy(dtype=object)
+            if "new_value" in corr_view.columns else np.full(len(corr_view), "", dtype=object)
+        ),
+    })
+    corr["_seq"] = np.arange(len(corr))
+
+    # mode: overwrite rule
+    if skip_empty:
+        corr = corr[corr["new_value"] != ""]
+
+    # ---- Question must exist in Data_Set ----
+    col_ok = corr["Question"].isin(set(data_df.columns))
+    missing_col = corr.loc[~col_ok, ["_seq", "Question"]]
+    errors_df = [pd.DataFrame({
+        "_seq": missing_col["_seq"].to_numpy(),
+        "msg": ("Column not found in Data_Set: " + missing_col["Question"]).to_numpy(dtype=object),
+    })]
+    corr = corr[col_ok]
+
+    # ---- _uuid lookup (one merge instead of one full scan per correction) ----
+    matched = corr.merge(build_uuid_index(data_df, uuid_col), on="_uuid", how="left")
+    not_found = matched["_pos"].isna()
+    missing_uuid = matched.loc[not_found, ["_seq", "_uuid"]]
+    errors_df.append(pd.DataFrame({
+        "_seq": missing_uuid["_seq"].to_numpy(),
+        "msg": ("_uuid not found in Data_Set: " + missing_uuid["_uuid"]).to_numpy(dtype=object),
+    }))
+
+    errors = pd.concat(errors_df, ignore_index=True).sort_values("_seq", kind="stable")["msg"].tolist()
+
+    matched = matched[~not_found].copy()
+    matched["_pos"] = matched["_pos"].astype(np.int64)
+    matched = matched.sort_values(["_seq", "_pos"], kind="stable")
+    matched["old_value"] = ""
+    changed_cells = []
+
+    # ---- column-wise vectorized assignment ----
+    for question, grp in matched.groupby("Question", sort=False):
+        col_positions = np.flatnonzero(data_df.columns == question)
+        pos = grp["_pos"].to_numpy()
+        new_vals = grp["new_value"].to_numpy(dtype=object)
+
+        current = data_df.iloc[pos, col_positions[0]].to_numpy(dtype=object)
+        # If the same cell is corrected twice, the 2nd correction sees the 1st one's value
+        prev = grp.groupby("_pos", sort=False)["new_value"].shift(1)
+        old = np.where(prev.notna().to_numpy(), prev.to_numpy(dtype=object), current)
+        matched.loc[grp.index, "old_value"] = old
+
+        # last correction per cell wins; a duplicated header name gets the value in every column
+        is_last = ~pd.Series(pos).duplicated(keep="last").to_numpy()
+        last_pos, last_vals = pos[is_last], new_vals[is_last]
+        for col_pos in col_positions:
+            # cells that end up different from what was in the sheet - per column, the
+            # duplicates can hold different values
+            before = data_df.iloc[last_pos, col_pos].to_numpy(dtype=object)
+            changed_cells.extend((int(r), int(col_pos)) for r in last_pos[last_vals != before])
+            data_df.iloc[last_pos, col_pos] = last_vals
+
+    applied_cells = int(len(matched))
+
+    # one log entry per correction (old value from the first matched row)
+    first = matched.drop_duplicates("_seq", keep="first")
+    change_log = [
+        {"_uuid": u, "Question": q, "old_value_sample": o, "new_value": n}
+        for u, q, o, n in zip(first["_uuid"], first["Question"], first["old_value"], first["new_value"])
+    ]
+
+    return {
+        "change_log": change_log,
+        "errors": errors,
+        "applied_cells": applied_cells,
+        "changed_cells": sorted(changed_cells),
+    }
@@ -0,0 +1,96 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.column_types import get_column_types, get_typed_frame
+from utils.sheets import DATA_TTL, get_version, sheet_revision
+
+# ---------------- CONFIG ----------------
+CORR_BLOCK = 256      # columns per block -> each matmul is at most n x 256 by n x 256
+MIN_PAIRS = 3         # fewer jointly non-missing rows -> NaN
+
+
+# ---------------- KERNEL ----------------
+def _standardized(df: pd.DataFrame, cols: slice):
+    """(z, mask, z*z) as float32 for one column block; z = 0 where the value is missing."""
+    x = df.iloc[:, cols].to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(x)
+    # standardize first so float32 sums don't lose the signal to cancellation
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # all-empty columns
+        mean = np.nanmean(x, axis=0)
+        scale = np.nanstd(x, axis=0)
+    mean = np.where(np.isfinite(mean), mean, 0.0)
+    scale = np.where((scale > 0) & np.isfinite(scale), scale, 1.0)
+    z = np.where(valid, (x - mean) / scale, 0.0).astype("float32")
+    return z, valid.astype("float32"), z * z
+
+
+def correlation_matrix(df: pd.DataFrame, block: int = CORR_BLOCK, min_pairs: int = MIN_PAIRS):
+    """
+    Pearson correlation of every numeric column pair with pairwise-complete rows
+    (same definition as DataFrame.corr()), via float32 matmuls over column blocks.
+    Only two column blocks are converted / standardized at a time.
+
+    Returns (corr, counts): two columns x columns DataFrames; counts = rows where both are present.
+    """
+    cols = list(df.columns)
+    p = len(cols)
+    corr = np.full((p, p), np.nan)
+    counts = np.zeros((p, p), dtype="int64")
+    for i0 in range(0, p, block):
+        bi = slice(i0, min(i0 + block, p))
+        zi, mi, zi2 = _standardized(df, bi)
+        for j0 in range(i0, p, block):
+            bj = slice(j0, min(j0 + block, p))
+            zj, mj, zj2 = (zi, mi, zi2) if j0 == i0 else _standardized(df, bj)
+            n = (mi.T @ mj).astype("float64")
+            sx = (zi.T @ mj).astype("float64")
+            sy = (mi.T @ zj).astype("float64")
+            sxx = (zi2.T @ mj).astype("float64")
+            syy = (mi.T @ zj2).astype("float64")
+            sxy = (zi.T @ zj).astype("float64")
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cov = n * sxy - sx * sy
+                var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+                r = np.clip(cov / np.sqrt(var), -1.0, 1.0)
+            r[(n < min_pairs) | ~(var > 1e-12 * n * n)] = np.nan
+            corr[bi, bj] = r
+            corr[bj, bi] = r.T
+            counts[bi, bj] = np.rint(n)
+            counts[bj, bi] = np.rint(n).T
+
+    for k in range(p):
+        if counts[k, k] >= min_pairs and not np.isnan(corr[k, k]):
+            corr[k, k] = 1.0
+    return pd.DataFrame(corr, index=cols, columns=cols), pd.DataFrame(counts, index=cols, columns=cols)
+
+
+def top_pairs(corr: pd.DataFrame, counts: pd.DataFrame, k: int = 50, min_abs: float = 0.0) -> pd.DataFrame:
+    """Strongest |r| pairs (each pair once), with the number of rows behind each value."""
+    r = corr.to_numpy()
+    i, j = np.triu_indices(len(r), k=1)
+    out = pd.DataFrame({
+        "Column A": corr.index[i],
+        "Column B": corr.columns[j],
+        "r": r[i, j],
+        "rows": counts.to_numpy()[i, j],
+    }).dropna(subset=["r"])
+    out = out[out["r"].abs() >= min_abs]
+    return out.reindex(out["r"].abs().sort_values(ascending=False).index).head(k).reset_index(drop=True)
+
+
+# ---------------- CACHE ----------------
+@st.cache_data(show_spinner=False, ttl=DATA_TTL, max_entries=2)
+def _cached_correlation(name: str, version: int, revision: str):
+    types = get_column_types(name)
+    df = get_typed_frame(name)
+    numeric = [j for j, c in enumerate(df.columns) if types.get(c) == "numeric"]
+    return correlation_matrix(df.iloc[:, numeric])
+
+
+def get_correlation(name: str):
+    """(corr, counts) over all numeric columns of a worksheet, computed once per (version, revision)."""
+    return _cached_correlation(name, get_version(name), sheet_revision(name))
@@ -0,0 +1,109 @@
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# ---------------- CONFIG ----------------
+KEY_COLS = ["_uuid", "Question", "old_value"]   # Correction_Log columns A:C
+
+INDEX_DIR = os.environ.get(
+    "CBPAHA_HASH_INDEX_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "hash_index"),
+)
+
+_MIX = np.uint64(1000003)
+
+
+# ---------------- HASHING ----------------
+def hash_keys(df: pd.DataFrame, cols=KEY_COLS) -> np.ndarray:
+    """Stable 64-bit hash of the key tuple per row (same value in every process / run)."""
+    h = np.zeros(len(df), dtype=np.uint64)
+    for c in cols:
+        col_h = pd.util.hash_array(df[c].astype(str).to_numpy(dtype=object))
+        h = (h * _MIX) ^ col_h
+    return h
+
+
+def new_records(records: pd.DataFrame, existing_hashes: np.ndarray) -> pd.DataFrame:
+    """
+    Anti-join: records whose (_uuid, Question, old_value) is not in the log yet.
+    Duplicates inside `records` keep their first occurrence (same as the old set-based loop).
+    """
+    if records.empty:
+        return records
+    h = hash_keys(records)
+    keep = ~pd.Index(h).isin(existing_hashes)
+    keep &= ~pd.Series(h).duplicated(keep="first").to_numpy()
+    out = records[keep].copy()
+    out["_key_hash"] = h[keep]
+    return out
+
+
+# ---------------- PERSISTED INDEX ----------------
+def index_path(sheet_id: str, worksheet: str) -> str:
+    safe = re.sub(r"[^0-9A-Za-z_.-]+", "_", f"{sheet_id}__{worksheet}")
+    return os.path.join(INDEX_DIR, f"{safe}.npz")
+
+
+def load_hash_index(sheet_id: str, worksheet: str):
+    """{'rows': data rows covered, 'hashes': uint64 array} or None if missing / unreadable."""
+    path = index_path(sheet_id, worksheet)
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as z:
+            return {"rows": int(z["rows"]), "hashes": z["hashes"].astype(np.uint64)}
+    except Exception:
+        return None
+
+
+def save_hash_index(sheet_id: str, worksheet: str, index: dict):
+    """Atomic write; a failed save only costs a full re-scan next time."""
+    path = index_path(sheet_id, worksheet)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, rows=np.int64(index["rows"]), hashes=index["hashes"])
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def _pad(rows, width=len(KEY_COLS)):
+    return [list(r[:width]) + [""] * (width - len(r)) for r in rows]
+
+
+def sync_hash_index(ws, rebuild: bool = False) -> dict:
+    """
+    Bring the key index of a Correction_Log worksheet up to date.
+
+    First run (or rebuild): one full read, header written if the sheet is empty.
+    Later runs: only the rows below the indexed part are fetched (A{n+2}:C) and hashed.
+    Assumes the log is append-only in columns A:C - use rebuild after rows are edited or deleted.
+    """
+    sheet_id = ws.spreadsheet.id
+    index = None if rebuild else load_hash_index(sheet_id, ws.title)
+
+    if index is None:
+        existing = ws.get_all_values()
+        if not existing:
+            ws.update("A1:C1", [KEY_COLS])
+            existing = [KEY_COLS]
+        corr_df = pd.DataFrame(existing[1:], columns=existing[0]) if len(existing) > 1 \
+            else pd.DataFrame(columns=existing[0])
+        index = {"rows": len(corr_df), "hashes": hash_keys(corr_df)}
+    else:
+        tail = _pad(ws.get(f"A{index['rows'] + 2}:C"))
+        if tail:
+            tail_df = pd.DataFrame(tail, columns=KEY_COLS)
+            index = {
+                "rows": index["rows"] + len(tail_df),
+                "hashes": np.concatenate([index["hashes"], hash_keys(tail_df)]),
+            }
+
+    save_hash_index(sheet_id, ws.title, index)
+    return index
+
@@ -0,0 +1,342 @@
+import hashlib
+import os
+import pickle
+import re
+import tempfile
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+SCAN_STATE_DIR = os.environ.get(
+    "CBPAHA_SCAN_STATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "detection"),
+)
+SCAN_BLOCK_ROWS = 32     # rows per change-detection block (an edited cell rescans its block)
+SCAN_PAGE_ROWS = 2048    # rows per stored records page (a save rewrites only the pages it touched)
+_STATE_FORMAT = 2
+
+# Persian/Arabic block (covers Dari/Pashto/Arabic).
+# Not a raw string on purpose: the literal characters also work with the pyarrow (RE2) string engine.
+PERSOARABIC_RE = re.compile("[\u0600-\u06FF]")
+
+
+def contains_persoarabic(text) -> bool:
+    if text is None:
+        return False
+    return bool(PERSOARABIC_RE.search(str(text)))
+
+
+def factorize_grid(df: pd.DataFrame):
+    """
+    Column-wise factorize into one shared dictionary.
+    Returns (codes: rows x columns int64, uniques: object array); NaN cells -> code -1 (uniques[-1] is None).
+    """
+    codes = np.empty(df.shape, dtype=np.int64)
+    parts, offset = [], 0
+    for j in range(df.shape[1]):
+        col_codes, col_uniques = pd.factorize(df.iloc[:, j])
+        codes[:, j] = np.where(col_codes < 0, -1, col_codes + offset)
+        parts.append(np.asarray(col_uniques, dtype=object))
+        offset += len(col_uniques)
+    parts.append(np.array([None], dtype=object))
+    return codes, np.concatenate(parts)
+
+
+def _hits(uniques: np.ndarray) -> np.ndarray:
+    # regex only once per distinct value; the None sentinel at the end never matches
+    hits = pd.Series(uniques[:-1], dtype=object).astype(str).str.contains(PERSOARABIC_RE).to_numpy(dtype=bool)
+    return np.append(hits, False)
+
+
+def persoarabic_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    rows x columns boolean matrix: cell contains Dari/Pashto script.
+    Survey answers repeat a lot, so the regex runs once per distinct value
+    and the result is broadcast back to the grid.
+    """
+    codes, uniques = factorize_grid(df)
+    return _hits(uniques)[codes]
+
+
+def _scan(df: pd.DataFrame, uuid_col: str):
+    """(rows, cols, records) - grid positions of the hits and the records frame, in loop order."""
+    out_cols = ["_uuid", "Question", "old_value"]
+    no_hits = np.empty(0, dtype=np.int64)
+    empty = (no_hits, no_hits, pd.DataFrame(columns=out_cols))
+    if df.empty:
+        return empty
+
+    uuids = df[uuid_col].astype(str).str.strip()
+    keep_rows = (uuids != "").to_numpy() & df[uuid_col].notna().to_numpy()
+    scan_cols = [j for j, c in enumerate(df.columns) if c != uuid_col]
+    if not scan_cols:
+        return empty
+
+    block = df.iloc[:, scan_cols]
+    codes, uniques = factorize_grid(block)
+    mask = _hits(uniques)[codes]
+    mask &= keep_rows[:, None]
+
+    # melt: nonzero() walks the matrix row-major -> same order as the loop
+    rows, cols = np.nonzero(mask)
+    return rows, np.asarray(scan_cols, dtype=np.int64)[cols], pd.DataFrame({
+        "_uuid": uuids.to_numpy(dtype=object)[rows],
+        "Question": np.asarray(block.columns, dtype=object)[cols],
+        "old_value": uniques[codes[rows, cols]],
+    }, columns=out_cols)
+
+
+def scan_persoarabic(df: pd.DataFrame, uuid_col: str) -> pd.DataFrame:
+    """
+    Detected records (_uuid, Question, old_value) for every cell with Dari/Pashto text.
+    Same rows and same order (row by row, then column order) as the old iterrows loop;
+    rows with an empty _uuid are skipped.
+    """
+    return _scan(df, uuid_col)[2]
+
+
+# ---------------- INCREMENTAL SCAN ----------------
+# Change detection reads the raw Arrow string buffers, so unchanged rows are never factorized:
+#   1. one hash per column over the rows seen last time (hashlib over the bytes, ~ memory speed);
+#   2. only for columns whose hash moved: a checksum per block of SCAN_BLOCK_ROWS rows, vectorized;
+#   3. the changed blocks and the appended rows are rescanned and merged into the stored records.
+# Records are kept in loop order with their grid keys; on disk they are split into pages of
+# SCAN_PAGE_ROWS rows and a save rewrites only the pages holding rescanned rows.
+_MASK64 = (1 << 64) - 1
+_P = 0x100000001B3                                   # odd -> invertible mod 2**64
+_P_INV = pow(_P, -1, 1 << 64)
+_powers = {"pow": np.ones(1, dtype=np.uint64), "inv": np.ones(1, dtype=np.uint64)}
+
+
+def _power_tables(n: int):
+    """P**k and P**-k (mod 2**64) for k < n."""
+    if len(_powers["pow"]) < n:
+        size = max(n, 2 * len(_powers["pow"]))
+        for name, base in (("pow", _P), ("inv", _P_INV)):
+            out = np.empty(size, dtype=np.uint64)
+            out[0] = 1
+            # doubling: out[k:2k] = out[:k] * base**k
+            k, step = 1, base
+            while k < size:
+                m = min(k, size - k)
+                out[k:k + m] = out[:m] * np.uint64(step)
+                k, step = k + m, (step * step) & _MASK64
+            _powers[name] = out
+    return _powers["pow"][:n], _powers["inv"][:n]
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+class _ColumnBytes:
+    """One column as Arrow buffers: cell lengths (-1 = missing), offsets and UTF-8 data."""
+
+    def __init__(self, s: pd.Series):
+        arr = getattr(s.array, "_pa_array", None)
+        if arr is None or not (pa.types.is_string(arr.type) or pa.types.is_large_string(arr.type)):
+            arr = pa.array(s.astype(str).tolist(), type=pa.string(), from_pandas=True)
+        arr = arr.combine_chunks() if isinstance(arr, pa.ChunkedArray) else arr
+        _, offsets, data = arr.buffers()
+        width = np.int64 if pa.types.is_large_string(arr.type) else np.int32
+        self.offsets = np.frombuffer(offsets, dtype=width)[arr.offset:arr.offset + len(arr) + 1].astype(np.int64)
+        lengths = np.diff(self.offsets)
+        if arr.null_count:
+            lengths[arr.is_null().to_numpy(zero_copy_only=False)] = -1
+        self.lengths = lengths.astype(np.int32)
+        self.data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(0, dtype=np.uint8)
+
+    def digests(self, *stops: int) -> list:
+        """Hashes of rows [0, stop) for each (increasing) stop, in one pass over the buffers."""
+        by_len, by_data = hashlib.blake2b(digest_size=16), hashlib.blake2b(digest_size=16)
+        out, prev = [], 0
+        for stop in stops:
+            by_len.update(self.lengths[prev:stop])
+            by_data.update(self.data[self.offsets[prev]:self.offsets[stop]])
+            out.append(by_len.digest() + by_data.digest())
+            prev = stop
+        return out
+
+    def checksums(self, start: int, stop: int, block_rows: int) -> np.ndarray:
+        """One uint64 per block of block_rows rows in [start, stop): position-aware sum of cell hashes."""
+        lo = int(self.offsets[start])
+        rel = self.offsets[start:stop + 1] - lo
+        pw, inv = _power_tables(int(rel[-1]) + 1)
+        acc = np.zeros(len(pw), dtype=np.uint64)
+        np.cumsum(self.data[lo:lo + len(pw) - 1].astype(np.uint64) * pw[:-1], out=acc[1:])
+        # polynomial hash of each cell's bytes, shifted back to position 0 -> independent of earlier cells
+        cells = (acc[rel[1:]] - acc[rel[:-1]]) * inv[rel[:-1]]
+        cells = _mix(cells ^ self.lengths[start:stop].astype(np.uint64))
+        weights = _BLOCK_WEIGHTS[:block_rows]
+        weighted = cells * np.resize(weights, len(cells))
+        return np.add.reduceat(weighted, np.arange(0, len(cells), block_rows)) if len(cells) else weighted
+
+
+_BLOCK_WEIGHTS = np.random.default_rng(0x5CA7).integers(1, 2**63, 4096, dtype=np.uint64) | np.uint64(1)
+
+
+def row_keys(df: pd.DataFrame, uuid_col: str) -> np.ndarray:
+    """Stable row identity: stripped _uuid plus its occurrence number (duplicate uuids stay distinct)."""
+    uuids = df[uuid_col].astype(str).str.strip()
+    nth = uuids.groupby(uuids, sort=False).cumcount().astype(str)
+    return (uuids + "#" + nth).to_numpy(dtype=object)
+
+
+def scan_persoarabic_incremental(df: pd.DataFrame, uuid_col: str, state=None,
+                                 block_rows: int = SCAN_BLOCK_ROWS, page_rows: int = SCAN_PAGE_ROWS):
+    """
+    scan_persoarabic, but only for rows in blocks that are new or changed since `state`.
+
+    Returns (records, new_state, scanned_rows); the output has the same rows and order as a
+    full scan. The previously seen rows must still come first in the same _uuid order (rows
+    appended and / or edited); a new header or deleted / reordered rows mean a full scan.
+    """
+    columns = tuple(map(str, df.columns))
+    keys = row_keys(df, uuid_col)
+    n, width = df.shape
+    cols = [_ColumnBytes(df.iloc[:, j]) for j in range(width)]
+    n_blocks = -(-n // block_rows)
+
+    old_n = state["rows"] if state else 0
+    reuse = (
+        state is not None and state.get("format") == _STATE_FORMAT
+        and state["columns"] == columns and state["uuid_col"] == uuid_col
+        and (state["block_rows"], state["page_rows"]) == (block_rows, page_rows)
+        and old_n <= n and np.array_equal(state["keys"], keys[:old_n])
+    )
+
+    checks = np.zeros((n_blocks, width), dtype=np.uint64)
+    if reuse:
+        # blocks reaching into the appended rows are rescanned anyway; the rest is compared
+        stable = -(-old_n // block_rows) if n == old_n else old_n // block_rows
+        checks[:stable] = state["checks"][:stable]
+        changed = np.zeros(stable, dtype=bool)
+        digests = []
+        for j, c in enumerate(cols):
+            seen, now = c.digests(old_n, n)
+            digests.append(now)
+            if seen != state["digests"][j]:
+                cur = c.checksums(0, min(stable * block_rows, n), block_rows)
+                changed |= cur != checks[:stable, j]
+                checks[:stable, j] = cur
+        blocks = np.concatenate([np.flatnonzero(changed), np.arange(stable, n_blocks)])
+    else:
+        stable = 0
+        digests = [c.digests(n)[0] for c in cols]
+        blocks = np.arange(n_blocks)
+    if stable < n_blocks:
+        for j, c in enumerate(cols):
+            checks[stable:, j] = c.checksums(stable * block_rows, n, block_rows)
+
+    starts = blocks * block_rows
+    positions = (starts[:, None] + np.arange(block_rows)).ravel() if len(blocks) else np.empty(0, dtype=np.int64)
+    positions = positions[positions < n]
+    rows, hit_cols, fresh = _scan(df.iloc[positions], uuid_col)
+    fresh_keys = positions[rows] * width + hit_cols
+
+    old_keys = state["hit_keys"] if reuse else None
+    if reuse and not len(positions):
+        records, hit_keys = state["records"], old_keys
+    elif reuse and len(old_keys) and old_keys[-1] < positions[0] * width:
+        # only rows below the old records were rescanned (appends): no reordering needed
+        records = pd.concat([state["records"], fresh], ignore_index=True)
+        hit_keys = np.concatenate([old_keys, fresh_keys])
+    elif reuse and len(old_keys):
+        # drop the old records of rescanned rows, splice in the new ones, one take in loop order
+        rescanned = np.zeros(n, dtype=bool)
+        rescanned[positions] = True
+        kept = np.flatnonzero(~rescanned[old_keys // width])
+        hit_keys = np.concatenate([old_keys[kept], fresh_keys])
+        order = np.argsort(hit_keys, kind="stable")   # two sorted runs -> linear merge
+        source = np.concatenate([kept, len(old_keys) + np.arange(len(fresh_keys))])[order]
+        records = pd.concat([state["records"], fresh], ignore_index=True).take(source).reset_index(drop=True)
+        hit_keys = hit_keys[order]
+    else:
+        records, hit_keys = fresh.reset_index(drop=True), fresh_keys
+
+    new_state = {
+        "format": _STATE_FORMAT, "columns": columns, "uuid_col": uuid_col,
+        "block_rows": block_rows, "page_rows": page_rows, "rows": n, "keys": keys,
+        "digests": digests, "checks": checks, "records": records, "hit_keys": hit_keys,
+        "dirty_pages": np.unique(positions // page_rows).tolist() if reuse else None,
+        "files": list(state.get("files", [])) if reuse else [],
+    }
+    return records, new_state, len(positions)
+
+
+# ---------------- STATE ON DISK ----------------
+# <SCAN_STATE_DIR>/<sheet>__<worksheet>/meta.pkl + the records in pages of SCAN_PAGE_ROWS rows; a save
+# writes the pages holding rescanned rows under new names, then meta.pkl (which lists the page files),
+# then removes files no longer listed.
+_loaded = {}   # state dir -> (token, state): no re-reading of the pages within the same process
+
+
+def _state_dir(sheet_id: str, worksheet: str) -> str:
+    safe = re.sub(r"[^0-9A-Za-z_.-]+", "_", f"{sheet_id}__{worksheet}")
+    return os.path.join(SCAN_STATE_DIR, safe)
+
+
+def _dump(path: str, obj):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+def load_scan_state(sheet_id: str, worksheet: str):
+    folder = _state_dir(sheet_id, worksheet)
+    try:
+        with open(os.path.join(folder, "meta.pkl"), "rb") as f:
+            meta = pickle.load(f)
+        cached = _loaded.get(folder)
+        if cached and cached[0] == meta["token"]:
+            return cached[1]
+        pages = []
+        for name in meta["files"]:
+            with open(os.path.join(folder, name), "rb") as f:
+                pages.append(pickle.load(f))
+        state = {
+            **meta,
+            "records": pd.concat([r for r, _ in pages], ignore_index=True),
+            "hit_keys": np.concatenate([k for _, k in pages]),
+        }
+        _loaded[folder] = (meta["token"], state)
+        return state
+    except Exception:
+        return None
+
+
+def save_scan_state(sheet_id: str, worksheet: str, state: dict):
+    """Writes only the pages with rows rescanned by the last scan; losing the state only means one full scan."""
+    folder = _state_dir(sheet_id, worksheet)
+    try:
+        os.makedirs(folder, exist_ok=True)
+        token = uuid.uuid4().hex[:12]
+        n_pages = max(1, -(-state["rows"] // state["page_rows"]))
+        # records are in row order: page p is one slice
+        cuts = np.searchsorted(
+            state["hit_keys"], np.arange(n_pages + 1) * state["page_rows"] * len(state["columns"])
+        )
+        files = (list(state["files"]) + [None] * n_pages)[:n_pages]
+        dirty = range(n_pages) if state["dirty_pages"] is None else state["dirty_pages"]
+        for p in dirty:
+            files[p] = f"page{p:05d}-{token}.pkl"
+            part = slice(cuts[p], cuts[p + 1] if p + 1 < n_pages else len(state["hit_keys"]))
+            _dump(os.path.join(folder, files[p]), (state["records"].iloc[part], state["hit_keys"][part]))
+        meta = {k: v for k, v in state.items() if k not in ("records", "hit_keys", "dirty_pages")}
+        meta.update(files=files, token=token)
+        _dump(os.path.join(folder, "meta.pkl"), meta)
+        _loaded[folder] = (token, {**meta, "records": state["records"], "hit_keys": state["hit_keys"]})
+        keep = set(files) | {"meta.pkl"}
+        for name in os.listdir(folder):
+            if name not in keep and not name.endswith(".tmp"):
+                os.remove(os.path.join(folder, name))
+    except Exception:
+        pass
@@ -0,0 +1,110 @@
+"""
+Batched Dari/Pashto -> English translation with the OpenAI chat API.
+
+Many short segments go into one request as numbered JSON; the reply must
+return every id exactly once. Batches are sized by an estimated token budget,
+and a batch whose reply is incomplete / malformed is split in half and retried
+(bisection) until single segments are left. The requests themselves are run
+concurrently by utils.async_llm.
+"""
+import json
+
+# ---------------- CONFIG ----------------
+BATCH_TOKEN_BUDGET = 1_500   # estimated input tokens of segment text per request
+MAX_SEGMENTS = 50            # segments per request, whatever their size
+RATE_RETRIES = 4             # retries of the same batch after a 429 before giving up on it
+OUTPUT_TOKEN_RATIO = 2.0     # English output tokens per Dari/Pashto input token (generous)
+NO_JSON_MODE = {"gpt-4"}     # models without response_format={"type": "json_object"}
+
+SYSTEM_PROMPT = (
+    "You translate survey answers from Dari or Pashto into simple, human, non-native English. "
+    "Do NOT normalize or paraphrase; keep the meaning exactly as is. "
+    "If a segment is already in English, return it unchanged.\n"
+    'Input: JSON {"segments": [{"id": <int>, "text": <string>}, ...]}.\n'
+    'Output: JSON {"translations": [{"id": <same int>, "text": <English translation>}, ...]} '
+    "with exactly one entry for every input id and nothing else."
+)
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:
+    _ENCODING = None
+
+
+class BatchMismatch(ValueError):
+    """The reply did not contain exactly one translation per segment."""
+
+
+# ---------------- SIZING ----------------
+def estimate_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Arabic-script text averages roughly 2-3 characters per token; stay on the safe side
+    return len(text) // 2 + 1
+
+
+def pack_batches(texts: list, budget: int = BATCH_TOKEN_BUDGET, max_segments: int = MAX_SEGMENTS) -> list:
+    """Greedy split of range(len(texts)) into consecutive batches within the token budget."""
+    batches, cur, used = [], [], 0
+    for i, t in enumerate(texts):
+        cost = estimate_tokens(t) + 8   # id + JSON punctuation
+        if cur and (used + cost > budget or len(cur) >= max_segments):
+            batches.append(cur)
+            cur, used = [], 0
+        cur.append(i)
+        used += cost
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+# ---------------- ONE REQUEST ----------------
+def parse_reply(content: str, ids: list) -> dict:
+    """{id: translation}; raises BatchMismatch unless every id came back exactly once."""
+    content = content.strip()
+    if content.startswith("```"):
+        # a fenced ```json block from models without JSON mode
+        content = content.strip("`").removeprefix("json").strip()
+    try:
+        items = json.loads(content)["translations"]
+        out = {}
+        for item in items:
+            key = int(item["id"])
+            if key in out:
+                raise BatchMismatch(f"id {key} returned twice")
+            out[key] = str(item["text"]).strip()
+    except BatchMismatch:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise BatchMismatch(f"unreadable reply: {e}") from e
+    if set(out) != set(ids):
+        raise BatchMismatch(f"expected {len(ids)} ids, got {len(out)} ({len(set(ids) - set(out))} missing)")
+    if any(not out[i] for i in ids):
+        raise BatchMismatch("empty translation in reply")
+    return out
+
+
+def build_request(model: str, texts: list):
+    """chat.completions.create kwargs for one batch, and the ids the reply must contain."""
+    ids = list(range(1, len(texts) + 1))
+    payload = json.dumps({"segments": [{"id": i, "text": t} for i, t in zip(ids, texts)]}, ensure_ascii=False)
+    kwargs = {
+        "model": model,
+        "messages": [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": payload}],
+        "temperature": 0,
+        "max_tokens": int(sum(estimate_tokens(t) for t in texts) * OUTPUT_TOKEN_RATIO) + 16 * len(texts) + 64,
+    }
+    if model not in NO_JSON_MODE:
+        kwargs["response_format"] = {"type": "json_object"}
+    return kwargs, ids
+
+
+def read_reply(response, ids: list) -> list:
+    got = parse_reply(response.choices[0].message.content or "", ids)
+    return [got[i] for i in ids]
+
+
+def is_rate_limit(exc: Exception) -> bool:
+    return getattr(exc, "status_code", None) == 429 or type(exc).__name__ == "RateLimitError"
+
@@ -0,0 +1,217 @@
+"""
+Offline stand-in for the gspread objects the pages use.
+
+LocalSpreadsheet / LocalWorksheet implement the subset of the gspread API
+the app relies on (worksheet, add_worksheet, get_all_values, get, batch_get,
+row_values, col_values, update, append_rows, batch_update), stored as one CSV file per worksheet.
+They can inject latency and raise 429 quota errors, so the apply / append /
+monitor flows can be profiled without Google credentials.
+
+Enable it for the whole app with:
+    CBPAHA_SHEETS_BACKEND=local CBPAHA_LOCAL_SHEETS_DIR=./local_sheets streamlit run app.py
+"""
+import csv
+import os
+import random
+import threading
+import time
+
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import a1_to_rowcol
+
+
+class _FakeResponse:
+    def __init__(self, code: int, message: str, status: str):
+        self.status_code = code
+        self.text = message
+        self._payload = {"error": {"code": code, "message": message, "status": status}}
+
+    def json(self):
+        return self._payload
+
+
+def quota_error() -> APIError:
+    """Same shape as the APIError gspread raises for HTTP 429."""
+    return APIError(_FakeResponse(429, "Quota exceeded (simulated by local backend)", "RESOURCE_EXHAUSTED"))
+
+
+def _parse_range(range_name: str):
+    """'A1', 'B2:D9', 'A5:C', 'Sheet!A1:C3' -> (row1, col1, row2 or None, col2), 1-based."""
+    rng = range_name.split("!")[-1]
+    start, _, end = rng.partition(":")
+    r1, c1 = a1_to_rowcol(start)
+    if not end:
+        return r1, c1, r1, c1
+    if end.isalpha():
+        # open-ended column range ("A5:C" = to the last row)
+        _, c2 = a1_to_rowcol(f"{end}1")
+        return r1, c1, None, c2
+    r2, c2 = a1_to_rowcol(end)
+    return r1, c1, r2, c2
+
+
+# ---------------- SPREADSHEET ----------------
+class LocalSpreadsheet:
+    def __init__(self, folder: str, latency: float = 0.0, quota_error_rate: float = 0.0, seed=None):
+        self.folder = folder
+        self.id = os.path.basename(os.path.abspath(folder))
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.request_count = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.RLock()
+        self._worksheets = {}
+        os.makedirs(folder, exist_ok=True)
+
+    # every simulated API call goes through here
+    def _call(self):
+        with self._lock:
+            self.request_count += 1
+            fail = self.quota_error_rate > 0 and self._rng.random() < self.quota_error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise quota_error()
+
+    def _path(self, title: str) -> str:
+        safe = "".join(ch if ch.isalnum() or ch in "-_ " else "_" for ch in title)
+        return os.path.join(self.folder, f"{safe}.csv")
+
+    def worksheet(self, title: str):
+        self._call()
+        if title in self._worksheets:
+            return self._worksheets[title]
+        if not os.path.exists(self._path(title)):
+            raise WorksheetNotFound(title)
+        ws = LocalWorksheet(self, title, self._path(title))
+        self._worksheets[title] = ws
+        return ws
+
+    def add_worksheet(self, title: str, rows=1000, cols=26, **kwargs):
+        self._call()
+        path = self._path(title)
+        if not os.path.exists(path):
+            open(path, "w", newline="", encoding="utf-8").close()
+        ws = LocalWorksheet(self, title, path)
+        self._worksheets[title] = ws
+        return ws
+
+    def get_revision(self) -> str:
+        """Stand-in for the Drive 'version' probe: newest CSV mtime in the folder."""
+        self._call()
+        mtimes = [
+            os.stat(os.path.join(self.folder, f)).st_mtime_ns
+            for f in os.listdir(self.folder) if f.endswith(".csv")
+        ]
+        return str(max(mtimes, default=0))
+
+
+# ---------------- WORKSHEET ----------------
+class LocalWorksheet:
+    def __init__(self, spreadsheet: LocalSpreadsheet, title: str, path: str):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.path = path
+
+    # ---- storage ----
+    def _read(self) -> list:
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return [row for row in csv.reader(f)]
+
+    def _write(self, grid: list):
+        # pad to a rectangle like get_all_values() returns
+        width = max((len(r) for r in grid), default=0)
+        while grid and not any(grid[-1]):
+            grid.pop()
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows([r + [""] * (width - len(r)) for r in grid])
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _set_block(grid: list, row: int, col: int, values: list):
+        for i, vals in enumerate(values):
+            r = row - 1 + i
+            while len(grid) <= r:
+                grid.append([])
+            line = grid[r]
+            need = col - 1 + len(vals)
+            if len(line) < need:
+                line.extend([""] * (need - len(line)))
+            for j, v in enumerate(vals):
+                line[col - 1 + j] = "" if v is None else str(v)
+
+    # ---- gspread API subset ----
+    def get_all_values(self, **kwargs) -> list:
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            return self._read()
+
+    @staticmethod
+    def _range_values(grid: list, range_name: str) -> list:
+        r1, c1, r2, c2 = _parse_range(range_name)
+        rows = grid[r1 - 1:] if r2 is None else grid[r1 - 1:r2]
+        # like the API: trailing empty cells / rows are not returned
+        out = [[v for v in row[c1 - 1:c2]] for row in rows]
+        out = [row[:max((i + 1 for i, v in enumerate(row) if v != ""), default=0)] for row in out]
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def get(self, range_name: str, **kwargs) -> list:
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            grid = self._read()
+        return self._range_values(grid, range_name)
+
+    def batch_get(self, ranges: list, **kwargs) -> list:
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            grid = self._read()
+        return [self._range_values(grid, r) for r in ranges]
+
+    def row_values(self, row: int, **kwargs) -> list:
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            grid = self._read()
+        line = grid[row - 1] if row <= len(grid) else []
+        return line[:max((i + 1 for i, v in enumerate(line) if v != ""), default=0)]
+
+    def col_values(self, col: int, **kwargs) -> list:
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            grid = self._read()
+        out = [line[col - 1] if col <= len(line) else "" for line in grid]
+        while out and out[-1] == "":
+            out.pop()
+        return out
+
+    def update(self, range_name=None, values=None, **kwargs):
+        # accept both gspread 5 (range, values) and gspread 6 (values, range) order
+        if isinstance(range_name, list):
+            range_name, values = values, range_name
+        self.spreadsheet._call()
+        r1, c1, _, _ = _parse_range(range_name or "A1")
+        with self.spreadsheet._lock:
+            grid = self._read()
+            self._set_block(grid, r1, c1, values or [])
+            self._write(grid)
+        return {"updatedRange": range_name}
+
+    def batch_update(self, data: list, **kwargs):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            grid = self._read()
+            for item in data:
+                r1, c1, _, _ = _parse_range(item["range"])
+                self._set_block(grid, r1, c1, item["values"])
+            self._write(grid)
+        return {"totalUpdatedRanges": len(data)}
+
+    def append_rows(self, values: list, **kwargs):
+        self.spreadsheet._call()
+        with self.spreadsheet._lock:
+            grid = self._read()
+            grid.extend([["" if v is None else str(v) for v in row] for row in values])
+            self._write(grid)
+        return {"updates": {"updatedRows": len(values)}}
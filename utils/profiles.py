@@ -0,0 +1,161 @@
+import json
+import os
+import re
+import tempfile
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from utils.records import col_letter, get_header
+from utils.sheets import get_spreadsheet, get_version, get_worksheet, load_df, sheet_revision
+
+# ---------------- CONFIG ----------------
+SELECT_MAX = 7                      # <= this many distinct answers -> rendered as a select
+NA_TOKENS = {"", "nan", "None"}
+
+PROFILE_DIR = os.environ.get(
+    "CBPAHA_PROFILE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "profiles"),
+)
+
+
+# ---------------- BUILD / UPDATE ----------------
+def _distinct(col: pd.Series, cap: int, seen=None) -> list:
+    """Stripped, non-NA distinct values (first-seen order), at most cap + 1 of them."""
+    out = list(seen or [])
+    if len(out) > cap:
+        return out
+    # factorize first: strip / compare only once per distinct raw value
+    _, uniques = pd.factorize(col.astype(str), use_na_sentinel=False)
+    known = set(out)
+    for v in uniques:
+        v = str(v).strip()
+        if v in NA_TOKENS or v in known:
+            continue
+        out.append(v)
+        known.add(v)
+        if len(out) > cap:
+            break
+    return out
+
+
+def _field(values: list, cap: int) -> dict:
+    if len(values) <= cap:
+        return {"type": "select", "values": values, "options": sorted(values), "cardinality": len(values)}
+    return {"type": "text", "values": values, "options": None, "cardinality": len(values)}
+
+
+def build_profile(df: pd.DataFrame, cap: int = SELECT_MAX) -> dict:
+    """
+    Per column: type ('select' / 'text'), sorted options for selects, and the distinct values
+    capped at cap + 1 ('cardinality' == cap + 1 means "more than cap").
+    """
+    fields = {}
+    for j, c in enumerate(df.columns):
+        fields[c] = _field(_distinct(df.iloc[:, j], cap), cap)
+    return {"columns": list(df.columns), "rows": len(df), "cap": cap, "fields": fields}
+
+
+def update_profile(profile: dict, new_rows: pd.DataFrame) -> dict:
+    """Profile after appending `new_rows` (same columns): only the new rows are scanned."""
+    cap = profile["cap"]
+    fields = dict(profile["fields"])
+    for j, c in enumerate(new_rows.columns):
+        prev = fields[c]["values"]
+        if len(prev) > cap:
+            continue  # already 'text'; more rows can't change that
+        fields[c] = _field(_distinct(new_rows.iloc[:, j], cap, seen=prev), cap)
+    return {**profile, "rows": profile["rows"] + len(new_rows), "fields": fields}
+
+
+def field_type(profile: dict, q: str):
+    """(type, options) for the form - a dict lookup."""
+    f = profile["fields"].get(q)
+    if f is None:
+        return "text", None
+    return f["type"], f["options"]
+
+
+# ---------------- PERSISTENCE ----------------
+def _profile_path(sheet_id: str, name: str) -> str:
+    safe = re.sub(r"[^0-9A-Za-z_.-]+", "_", f"{sheet_id}__{name}")
+    return os.path.join(PROFILE_DIR, f"{safe}.json")
+
+
+def _load(sheet_id: str, name: str):
+    try:
+        with open(_profile_path(sheet_id, name), encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _save(sheet_id: str, name: str, profile: dict):
+    path = _profile_path(sheet_id, name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(profile, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+# ---------------- SHARED PROFILE ----------------
+@st.cache_resource(show_spinner=False)
+def _profile_registry() -> dict:
+    return {"lock": threading.Lock()}
+
+
+def _row(values, width: int) -> list:
+    return [str(v) for v in (list(values) + [""] * width)[:width]]
+
+
+def get_profile(name: str, cap: int = SELECT_MAX, rebuild: bool = False) -> dict:
+    """
+    Dataset profile shared by all sessions, refreshed at most once per (version, revision).
+    The profile is only extended in place when nothing but appends can have happened: same
+    version (no write from this app), same header, and the last profiled row still in place.
+    Then only the rows below it are fetched and scanned. Anything else (app writes, deleted or
+    inserted rows, a new header, rebuild=True) rebuilds from the cached DataFrame. Hand edits
+    to older rows made outside the app show up after the next write from the app.
+    """
+    registry = _profile_registry()
+    version = get_version(name)
+    key = [version, sheet_revision(name)]
+    sheet_id = get_spreadsheet().id
+
+    with registry["lock"]:
+        profile = None if rebuild else (registry.get(name) or _load(sheet_id, name))
+        if profile is not None and profile.get("key") == key and profile.get("cap") == cap:
+            registry[name] = profile
+            return profile
+
+        header = get_header(name)
+        width = len(header)
+        new_rows = None
+        if (
+            profile is not None and profile.get("cap") == cap and profile["columns"] == header
+            and profile.get("key", [None])[0] == version and "last_row" in profile
+        ):
+            # re-read the last profiled row too: if it moved or changed, rows were deleted / edited above
+            start = profile["rows"] + 1
+            tail = get_worksheet(name).get(f"A{start}:{col_letter(width)}") if profile["rows"] else None
+            if profile["rows"] and tail and _row(tail[0], width) == profile["last_row"]:
+                new_rows = [_row(r, width) for r in tail[1:]]
+
+        if new_rows is None:
+            df = load_df(name)
+            profile = build_profile(df, cap)
+            profile["columns"] = list(header)   # compare against row 1 as the API returns it
+            profile["last_row"] = _row(df.iloc[-1], width) if len(df) else None
+        elif new_rows:
+            profile = update_profile(profile, pd.DataFrame(new_rows, columns=header))
+            profile["last_row"] = new_rows[-1]
+
+        profile["key"] = key
+        registry[name] = profile
+        _save(sheet_id, name, profile)
+        return profile
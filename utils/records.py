@@ -0,0 +1,160 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+from gspread.utils import rowcol_to_a1
+
+from utils.sheets import DATA_TTL, get_version, get_worksheet, sheet_revision
+
+UUID_COL = "_uuid"
+PREFETCH_MAX = 512      # prefetched rows kept in memory (LRU)
+
+
+def col_letter(col: int) -> str:
+    return rowcol_to_a1(1, col)[:-1]
+
+
+# ---------------- HEADER ----------------
+@st.cache_data(show_spinner=False, ttl=DATA_TTL, max_entries=32)
+def _cached_header(name: str, version: int, revision: str) -> list:
+    return get_worksheet(name).row_values(1)
+
+
+def get_header(name: str) -> list:
+    """Row 1 of the worksheet (one small request per revision)."""
+    return _cached_header(name, get_version(name), sheet_revision(name))
+
+
+# ---------------- _uuid -> ROW INDEX ----------------
+@st.cache_resource(show_spinner=False)
+def _index_registry() -> dict:
+    return {"lock": threading.Lock()}
+
+
+def _sync_index(name: str, rebuild: bool = False) -> dict:
+    """
+    {'uuids': [...], 'rows': {uuid: sheet row}} for the worksheet, shared by all sessions.
+    Built once from the _uuid column only; when the revision changes, only the rows
+    below the indexed part are fetched. First occurrence wins (same as df[...].iloc[0]).
+    """
+    registry = _index_registry()
+    key = (get_version(name), sheet_revision(name))
+    with registry["lock"]:
+        entry = registry.get(name)
+        if entry is not None and not rebuild and entry["key"] == key:
+            return entry
+
+        ws = get_worksheet(name)
+        header = get_header(name)
+        uuid_pos = header.index(UUID_COL) + 1
+
+        if entry is None or rebuild:
+            entry = {"uuids": [], "rows": {}}
+            new = ws.col_values(uuid_pos)[1:]
+        else:
+            col = col_letter(uuid_pos)
+            start = len(entry["uuids"]) + 2
+            new = [r[0] if r else "" for r in ws.get(f"{col}{start}:{col}")]
+
+        base = len(entry["uuids"]) + 2
+        for i, u in enumerate(new):
+            entry["rows"].setdefault(str(u), base + i)
+        entry["uuids"].extend(new)
+        entry["key"] = key
+        registry[name] = entry
+        return entry
+
+
+# ---------------- SINGLE RECORD ----------------
+def _to_record(values: list, header: list, row_num: int) -> pd.Series:
+    row = list(values[0]) if values else []
+    row = (row + [""] * len(header))[:len(header)]
+    return pd.Series(row, index=header, dtype=object, name=row_num)
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL, max_entries=256)
+def _cached_record(name: str, uuid: str, version: int, revision: str):
+    header = get_header(name)
+    last_col = col_letter(len(header))
+    ws = get_worksheet(name)
+
+    # second attempt rebuilds the index (rows were inserted / deleted / edited in place)
+    for rebuild in (False, True):
+        row_num = _sync_index(name, rebuild=rebuild)["rows"].get(uuid)
+        if row_num is None:
+            continue
+        record = _to_record(ws.get(f"A{row_num}:{last_col}{row_num}"), header, row_num)
+        if record[UUID_COL] == uuid:
+            return record
+    return None
+
+
+# ---------------- PREFETCH ----------------
+@st.cache_resource(show_spinner=False)
+def _prefetch_store() -> dict:
+    return {
+        "lock": threading.Lock(),
+        "rows": OrderedDict(),          # (name, uuid, version, revision) -> Series
+        "inflight": set(),
+        "pool": ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch"),
+    }
+
+
+def _prefetch_job(store: dict, ws, header: list, jobs: list):
+    """jobs: [(cache_key, row_num)] -> one batch_get for all rows."""
+    last_col = col_letter(len(header))
+    try:
+        values = ws.batch_get([f"A{r}:{last_col}{r}" for _, r in jobs])
+    except Exception:
+        values = None
+    with store["lock"]:
+        for i, (key, row_num) in enumerate(jobs):
+            store["inflight"].discard(key)
+            if values is None:
+                continue
+            record = _to_record(values[i], header, row_num)
+            if record[UUID_COL] == key[1]:   # stale index -> leave it to get_record()
+                store["rows"][key] = record
+        while len(store["rows"]) > PREFETCH_MAX:
+            store["rows"].popitem(last=False)
+
+
+def prefetch_records(name: str, uuids) -> int:
+    """
+    Reads the given records in the background with ONE batch request; get_record()
+    serves them from memory afterwards. Returns how many rows were queued.
+    """
+    store = _prefetch_store()
+    version, revision = get_version(name), sheet_revision(name)
+    header = get_header(name)
+    rows = _sync_index(name)["rows"]
+
+    jobs = []
+    with store["lock"]:
+        for u in uuids:
+            key = (name, str(u), version, revision)
+            row_num = rows.get(str(u))
+            if row_num is None or key in store["rows"] or key in store["inflight"]:
+                continue
+            store["inflight"].add(key)
+            jobs.append((key, row_num))
+    if jobs:
+        store["pool"].submit(_prefetch_job, store, get_worksheet(name), header, jobs)
+    return len(jobs)
+
+
+def get_record(name: str, uuid: str):
+    """
+    One Data_Set row as a Series (index = header), or None if the _uuid does not exist.
+    Reads a single row range via the cached _uuid index instead of the full grid;
+    reruns within the same revision cost no API calls. Prefetched rows are served from memory.
+    """
+    version, revision = get_version(name), sheet_revision(name)
+    store = _prefetch_store()
+    with store["lock"]:
+        record = store["rows"].get((name, str(uuid), version, revision))
+    if record is not None:
+        return record.copy()
+    return _cached_record(name, str(uuid), version, revision)
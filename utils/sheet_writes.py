@@ -0,0 +1,269 @@
+import hashlib
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import uuid
+
+import pandas as pd
+from gspread.exceptions import APIError
+from gspread.utils import rowcol_to_a1
+
+
+# Above these limits a diff payload is no cheaper than rewriting the sheet
+MAX_DIFF_CELLS = 50_000
+MAX_DIFF_RANGES = 5_000
+FULL_WRITE_CHUNK_ROWS = 5_000
+
+# Appends: rows per append_rows call, and retry policy for 429 (quota) errors
+APPEND_CHUNK_ROWS = 2_000
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0     # seconds, doubled on every retry (+ jitter)
+BACKOFF_MAX = 64.0
+
+CHECKPOINT_DIR = os.environ.get(
+    "CBPAHA_CHECKPOINT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "append_checkpoints"),
+)
+CHECKPOINT_STALE_AFTER = 600.0   # seconds without a heartbeat before another session may resume an append
+
+
+# ---------------- RANGE COALESCING ----------------
+def coalesce_cells(cells) -> list:
+    """
+    cells: iterable of (row_pos, col_pos) in DataFrame coordinates (0-based, no header).
+    Returns contiguous vertical runs per column: [(col_pos, first_row_pos, last_row_pos), ...]
+    """
+    runs = []
+    for col_pos, row_pos in sorted({(c, r) for r, c in cells}):
+        if runs and runs[-1][0] == col_pos and runs[-1][2] == row_pos - 1:
+            runs[-1][2] = row_pos
+        else:
+            runs.append([col_pos, row_pos, row_pos])
+    return [tuple(r) for r in runs]
+
+
+def build_diff_payload(data_df: pd.DataFrame, cells) -> list:
+    """batch_update payload (A1 ranges) for the changed cells only. Sheet row = row_pos + 2 (header on row 1)."""
+    payload = []
+    for col_pos, r1, r2 in coalesce_cells(cells):
+        start = rowcol_to_a1(r1 + 2, col_pos + 1)
+        end = rowcol_to_a1(r2 + 2, col_pos + 1)
+        values = [[v] for v in data_df.iloc[r1:r2 + 1, col_pos].tolist()]
+        payload.append({"range": start if start == end else f"{start}:{end}", "values": values})
+    return payload
+
+
+# ---------------- WRITERS ----------------
+def write_full_sheet_chunked(ws, data_df: pd.DataFrame, chunk_rows: int = FULL_WRITE_CHUNK_ROWS) -> int:
+    """Rewrites header + all rows in row chunks (keeps every request under the payload limit). Returns request count."""
+    all_data = [data_df.columns.tolist()] + data_df.values.tolist()
+    n_cols = len(data_df.columns)
+    requests = 0
+    for start in range(0, len(all_data), chunk_rows):
+        block = all_data[start:start + chunk_rows]
+        first_row = start + 1
+        end_cell = rowcol_to_a1(first_row + len(block) - 1, n_cols)
+        ws.update(f"A{first_row}:{end_cell}", block)
+        requests += 1
+    return requests
+
+
+def write_changed_cells(ws, data_df: pd.DataFrame, cells,
+                        max_cells: int = MAX_DIFF_CELLS, max_ranges: int = MAX_DIFF_RANGES) -> dict:
+    """
+    Pushes only the changed cells in ONE batch_update call.
+    Falls back to chunked full-range writes when the diff is too large.
+    """
+    cells = list(cells)
+    if not cells:
+        return {"mode": "none", "cells": 0, "ranges": 0, "requests": 0}
+
+    payload = build_diff_payload(data_df, cells) if len(cells) <= max_cells else None
+    if payload is not None and len(payload) <= max_ranges:
+        ws.batch_update(payload, value_input_option="RAW")
+        return {"mode": "diff", "cells": len(cells), "ranges": len(payload), "requests": 1}
+
+    requests = write_full_sheet_chunked(ws, data_df)
+    return {"mode": "full", "cells": len(cells), "ranges": 0, "requests": requests}
+
+
+# ---------------- QUOTA / BACKOFF ----------------
+def is_quota_error(e: Exception) -> bool:
+    if not isinstance(e, APIError):
+        return False
+    code = getattr(e, "code", None)
+    if code is None:
+        code = getattr(getattr(e, "response", None), "status_code", None)
+    return code == 429
+
+
+def with_backoff(fn, *args, retries: int = MAX_RETRIES, base: float = BACKOFF_BASE,
+                 max_wait: float = BACKOFF_MAX, sleep=time.sleep, **kwargs):
+    """
+    Calls fn(*args, **kwargs), retrying 429 quota errors with exponential backoff + jitter.
+    Returns (result, retries_used); other errors (and the last 429) are raised.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fn(*args, **kwargs), attempt
+        except APIError as e:
+            if not is_quota_error(e) or attempt == retries:
+                raise
+            wait = min(max_wait, base * (2 ** attempt))
+            sleep(wait + random.uniform(0, wait / 2))
+
+
+# ---------------- RESUMABLE APPEND ----------------
+# One checkpoint per (worksheet, batch of rows) under <CHECKPOINT_DIR>/<sheet>__<title>/:
+#   <batch>.rows.json  the rows, written once
+#   <batch>.json       {"batch", "owner", "total", "done", "heartbeat"}, rewritten after every chunk
+# A checkpoint belongs to its owner (a session id) while its heartbeat is fresh; only the owner
+# or, once it is stale, anybody else may continue it.
+class AppendInProgress(RuntimeError):
+    """The same rows are being appended by another live session."""
+
+
+def _checkpoint_dir(ws) -> str:
+    safe = re.sub(r"[^0-9A-Za-z_.-]+", "_", f"{ws.spreadsheet.id}__{ws.title}")
+    return os.path.join(CHECKPOINT_DIR, safe)
+
+
+def _batch_id(rows: list) -> str:
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_json(path: str, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _resumable_by(checkpoint: dict, owner, stale_after: float) -> bool:
+    return checkpoint.get("owner") == owner or time.time() - checkpoint.get("heartbeat", 0) > stale_after
+
+
+class _Claim:
+    """Short exclusive lock (lock file) around check-and-take-over of one checkpoint."""
+
+    def __init__(self, path: str, timeout: float = 10.0, stale: float = 30.0):
+        self.path, self.timeout, self.stale = f"{path}.lock", timeout, stale
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale:
+                        os.remove(self.path)   # left behind by a crashed process
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise AppendInProgress("checkpoint is locked by another session")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def list_append_checkpoints(ws) -> list:
+    """Every unfinished append to this worksheet (without rows), newest heartbeat first."""
+    folder = _checkpoint_dir(ws)
+    try:
+        names = [n for n in os.listdir(folder) if n.endswith(".json") and not n.endswith(".rows.json")]
+    except FileNotFoundError:
+        return []
+    found = [_read_json(os.path.join(folder, n)) for n in names]
+    return sorted([c for c in found if c], key=lambda c: -c.get("heartbeat", 0))
+
+
+def load_append_checkpoint(ws, owner=None, stale_after: float = CHECKPOINT_STALE_AFTER):
+    """
+    {'batch', 'owner', 'total', 'done', 'heartbeat'} of an interrupted append this caller may
+    continue: its own (same owner), or anybody's that has had no heartbeat for stale_after seconds.
+    Appends still running in other sessions are never returned.
+    """
+    return next((c for c in list_append_checkpoints(ws) if _resumable_by(c, owner, stale_after)), None)
+
+
+def clear_append_checkpoint(ws, batch: str):
+    for suffix in (".json", ".rows.json"):
+        try:
+            os.remove(os.path.join(_checkpoint_dir(ws), batch + suffix))
+        except FileNotFoundError:
+            pass
+
+
+def append_rows_resumable(ws, rows: list, chunk_rows: int = APPEND_CHUNK_ROWS, progress=None, owner=None,
+                          stale_after: float = CHECKPOINT_STALE_AFTER, **backoff) -> dict:
+    """
+    Appends rows after the last row of the sheet (append_rows, so concurrent writers never
+    overwrite each other) in chunks of `chunk_rows`.
+
+    The rows are checkpointed once, then only the confirmed offset + a heartbeat after every chunk.
+    Calling again with the same rows (or resume_append) continues after the last confirmed chunk;
+    raises AppendInProgress if another owner's live upload of the same rows holds the checkpoint.
+    progress(done, total) is called after each chunk.
+    Returns {"rows", "requests", "retries", "resumed_from"}.
+    """
+    rows = [["" if v is None else str(v) for v in row] for row in rows]
+    owner = owner or uuid.uuid4().hex
+    batch = _batch_id(rows)
+    path = os.path.join(_checkpoint_dir(ws), f"{batch}.json")
+
+    with _Claim(path):
+        checkpoint = _read_json(path)
+        if checkpoint and not _resumable_by(checkpoint, owner, stale_after):
+            raise AppendInProgress(f"these {len(rows):,} rows are being uploaded by another session")
+        done = checkpoint["done"] if checkpoint else 0
+        if not checkpoint:
+            _write_json(os.path.join(_checkpoint_dir(ws), f"{batch}.rows.json"), rows)
+        state = {"batch": batch, "owner": owner, "total": len(rows), "done": done, "heartbeat": time.time()}
+        _write_json(path, state)
+    resumed_from = done
+
+    requests = retries = 0
+    while done < len(rows):
+        block = rows[done:done + chunk_rows]
+        _, used = with_backoff(ws.append_rows, block, value_input_option="RAW",
+                               insert_data_option="INSERT_ROWS", table_range="A1", **backoff)
+        done += len(block)
+        requests += 1
+        retries += used
+        _write_json(path, state | {"done": done, "heartbeat": time.time()})
+        if progress is not None:
+            progress(done, len(rows))
+
+    clear_append_checkpoint(ws, batch)
+    return {"rows": len(rows) - resumed_from, "requests": requests, "retries": retries, "resumed_from": resumed_from}
+
+
+def resume_append(ws, chunk_rows: int = APPEND_CHUNK_ROWS, progress=None, owner=None,
+                  stale_after: float = CHECKPOINT_STALE_AFTER, **backoff):
+    """Finishes the interrupted append load_append_checkpoint(ws, owner) returns; None if there is none."""
+    checkpoint = load_append_checkpoint(ws, owner, stale_after)
+    rows = checkpoint and _read_json(os.path.join(_checkpoint_dir(ws), f"{checkpoint['batch']}.rows.json"))
+    if not rows:
+        return None
+    return append_rows_resumable(ws, rows, chunk_rows=chunk_rows, progress=progress, owner=owner,
+                                 stale_after=stale_after, **backoff)
@@ -0,0 +1,258 @@
+"""
+Google Sheets access shared by every page: one client, one handle per worksheet,
+and DataFrames cached per (worksheet, version, revision).
+
+Freshness comes from the Drive 'version' of the whole spreadsheet, not of a single
+worksheet: Drive has no per-tab revision. So that an append to Correction_Log does
+not re-download Data_Set (and rebuild everything keyed on it), this app remembers
+the revisions its own writes produced; sheet_revision(name) skips those when they
+went to other worksheets. Limitation: an outside edit that lands in the same probe
+window (PROBE_TTL) as one of our writes is attributed to our write, so it only shows
+up in the other worksheets with the next outside edit, an invalidate() of them, or
+after DATA_TTL.
+"""
+import os
+import time
+
+import gspread
+import pandas as pd
+import streamlit as st
+from gspread.utils import rowcol_to_a1
+from oauth2client.service_account import ServiceAccountCredentials
+
+from utils.local_backend import LocalSpreadsheet
+from utils.snapshots import load_snapshot, save_snapshot
+
+# ---------------- CONFIG ----------------
+JSON_PATH = r"D:\IOM_CBPAHA\iomcbpaha-37221bb23bb2.json"  # local only
+SHEET_ID = "1AHTDIC9eAAitXwlR6wL_ruiTfZx6ytIuzJrV7GkHjQE"
+
+# "google" (default) or "local" (CSV files, see utils/local_backend.py) for offline testing / benchmarks
+SHEETS_BACKEND = os.environ.get("CBPAHA_SHEETS_BACKEND", "google")
+LOCAL_SHEETS_DIR = os.environ.get("CBPAHA_LOCAL_SHEETS_DIR", "local_sheets")
+LOCAL_LATENCY = float(os.environ.get("CBPAHA_LOCAL_LATENCY", "0"))
+LOCAL_QUOTA_ERROR_RATE = float(os.environ.get("CBPAHA_LOCAL_QUOTA_ERROR_RATE", "0"))
+
+SCOPE = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+
+# Freshness: a cheap Drive metadata probe decides whether the grid must be re-downloaded
+PROBE_TTL = 15          # seconds a probe result is trusted (reruns inside this window = 0 API calls)
+DEFAULT_TTL = 300       # fallback bucket when the probe is unavailable (e.g. no Drive scope)
+DATA_TTL = 6 * 60 * 60  # cached grids are keyed by revision, so this only bounds memory
+OWN_WRITES_KEPT = 256   # revisions produced by this app's writes, remembered per process
+
+
+# ---------------- AUTH (CLOUD + LOCAL) ----------------
+@st.cache_resource(show_spinner=False)
+def get_gspread_client():
+    """
+    One authorized client per process (shared by every page and session).
+    Streamlit Cloud secrets first, local JSON file as fallback.
+    """
+    try:
+        if "gcp_service_account" in st.secrets:
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(
+                st.secrets["gcp_service_account"], SCOPE
+            )
+            return gspread.authorize(creds)
+    except Exception:
+        pass
+
+    if os.path.exists(JSON_PATH):
+        creds = ServiceAccountCredentials.from_json_keyfile_name(JSON_PATH, SCOPE)
+        return gspread.authorize(creds)
+
+    st.error(
+        "No credentials found.\n\n"
+        "- Streamlit Cloud: add gcp_service_account in Secrets\n"
+        "- Local: make sure JSON_PATH exists"
+    )
+    st.stop()
+
+
+@st.cache_resource(show_spinner=False)
+def get_spreadsheet():
+    if SHEETS_BACKEND == "local":
+        return LocalSpreadsheet(
+            LOCAL_SHEETS_DIR, latency=LOCAL_LATENCY, quota_error_rate=LOCAL_QUOTA_ERROR_RATE
+        )
+    return get_gspread_client().open_by_key(SHEET_ID)
+
+
+# ---------------- WORKSHEETS ----------------
+@st.cache_resource(show_spinner=False)
+def _worksheet_registry() -> dict:
+    return {}
+
+
+def get_worksheet(name: str, header=None, rows: int = 2000, cols: int = 20):
+    """
+    Opens each worksheet once per process.
+    If the worksheet is missing and a header is given, it is created with that header;
+    otherwise WorksheetNotFound is raised (same as sh.worksheet()).
+    """
+    registry = _worksheet_registry()
+    ws = registry.get(name)
+    if ws is not None:
+        return ws
+
+    sh = get_spreadsheet()
+    try:
+        ws = sh.worksheet(name)
+    except gspread.exceptions.WorksheetNotFound:
+        if header is None:
+            raise
+        ws = sh.add_worksheet(title=name, rows=str(rows), cols=str(cols))
+        ws.update(f"A1:{rowcol_to_a1(1, len(header))}", [list(header)])
+
+    registry[name] = ws
+    return ws
+
+
+# ---------------- VERSIONS ----------------
+@st.cache_resource(show_spinner=False)
+def _version_registry() -> dict:
+    return {}
+
+
+def get_version(name: str) -> int:
+    return _version_registry().get(name, 0)
+
+
+def invalidate(name: str):
+    """Call after writing to a worksheet: the next load_df() re-downloads it (for every session)."""
+    registry = _version_registry()
+    registry[name] = registry.get(name, 0) + 1
+    # our own write changed the revision too; re-probe now instead of fetching twice,
+    # and remember the new revision as ours so other worksheets keep their cache
+    before = get_revision()
+    get_revision.clear()
+    after = get_revision()
+    if after != before and not after.startswith("ttl-"):
+        writes = _own_writes()
+        writes[after] = (before, name)
+        while len(writes) > OWN_WRITES_KEPT:
+            writes.pop(next(iter(writes)))
+
+
+# ---------------- FRESHNESS PROBE ----------------
+def get_drive_metadata(file_id: str, fields: str = "version,modifiedTime") -> dict:
+    client = get_gspread_client()
+    http = getattr(client, "http_client", client)  # gspread 6 / gspread 5
+    return http.request("get", f"{DRIVE_FILES_URL}/{file_id}", params={"fields": fields}).json()
+
+
+@st.cache_data(show_spinner=False, ttl=PROBE_TTL)
+def get_revision() -> str:
+    """
+    Spreadsheet revision from the Drive API ('version' bumps on every edit,
+    modifiedTime as backup). One tiny metadata request instead of get_all_values().
+    If the probe fails we fall back to plain TTL buckets.
+    """
+    try:
+        if SHEETS_BACKEND == "local":
+            return f"local-{get_spreadsheet().get_revision()}"
+        meta = get_drive_metadata(SHEET_ID)
+        rev = meta.get("version") or meta.get("modifiedTime")
+        if rev:
+            return str(rev)
+    except Exception:
+        pass
+    return f"ttl-{int(time.time() // DEFAULT_TTL)}"
+
+
+# ---------------- PER-WORKSHEET REVISION ----------------
+@st.cache_resource(show_spinner=False)
+def _own_writes() -> dict:
+    return {}   # revision after one of our writes -> (revision before it, worksheet written)
+
+
+@st.cache_resource(show_spinner=False)
+def _seen_revisions() -> dict:
+    return {}   # worksheet -> (last probed revision, revision its cache key uses)
+
+
+def sheet_revision(name: str) -> str:
+    """
+    Revision to key the caches of one worksheet on: get_revision(), except that
+    revision changes made by this app's own writes to OTHER worksheets are skipped
+    (the key stays at the revision the worksheet was last fetched at).
+    """
+    rev = get_revision()
+    seen = _seen_revisions()
+    last, key = seen.get(name, (None, rev))
+    if last is not None and last != rev:
+        writes = _own_writes()
+        r = rev
+        while r != last and r in writes and writes[r][1] != name:
+            r = writes[r][0]
+        if r != last:
+            key = rev
+    seen[name] = (rev, key)
+    return key
+
+
+# ---------------- DATAFRAMES ----------------
+def make_unique_headers(header_row):
+    seen = {}
+    new_cols = []
+    for c in header_row:
+        key = c if c is not None else ""
+        if key in seen:
+            seen[key] += 1
+            new_cols.append(f"{key}_{seen[key]}")
+        else:
+            seen[key] = 0
+            new_cols.append(key)
+    return new_cols
+
+
+def values_to_df(values, unique_headers: bool = False) -> pd.DataFrame:
+    if not values:
+        return pd.DataFrame()
+    header = make_unique_headers(values[0]) if unique_headers else values[0]
+    data = values[1:]
+    if not data:
+        return pd.DataFrame(columns=header)
+    return pd.DataFrame(data, columns=header)
+
+
+def fetch_df(name: str, version: int, revision: str, unique_headers: bool = False) -> pd.DataFrame:
+    """
+    Uncached read behind load_df(): the local snapshot of this revision or a full download.
+    For callers that keep only a derived frame in their own cache (e.g. the typed view).
+    """
+    # cold start: reuse the on-disk snapshot if it is from the same revision. Not after our own
+    # writes (version > 0): the revision probe can lag behind them and still name the old snapshot
+    persist = not revision.startswith("ttl-")
+    if persist and version == 0:
+        df = load_snapshot(get_spreadsheet().id, name, revision, unique_headers)
+        if df is not None:
+            return df
+
+    df = values_to_df(get_worksheet(name).get_all_values(), unique_headers=unique_headers)
+    if persist:
+        save_snapshot(df, get_spreadsheet().id, name, revision, unique_headers)
+    return df
+
+
+@st.cache_data(show_spinner=False, ttl=DATA_TTL, max_entries=32)
+def _cached_df(name: str, version: int, revision: str, unique_headers: bool) -> pd.DataFrame:
+    return fetch_df(name, version, revision, unique_headers)
+
+
+def load_df(name: str, unique_headers: bool = False) -> pd.DataFrame:
+    """
+    Worksheet as DataFrame, shared across pages and sessions.
+    Cached by (worksheet, version, revision): the full grid is only downloaded again
+    when the spreadsheet revision changes (other than by our own writes to other
+    worksheets, see sheet_revision) or invalidate(name) is called.
+    After a restart the same revision is served from the local Arrow snapshot
+    (until the first invalidate(name) of the process).
+    """
+    return _cached_df(name, get_version(name), sheet_revision(name), unique_headers)
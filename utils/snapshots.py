@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# ---------------- CONFIG ----------------
+SNAPSHOT_DIR = os.environ.get(
+    "CBPAHA_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "snapshots"),
+)
+
+
+# ---------------- PATHS ----------------
+def _safe(name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in str(name))
+
+
+def _prefix(worksheet: str, unique_headers: bool) -> str:
+    return f"{_safe(worksheet)}__{'u' if unique_headers else 'r'}__"
+
+
+def snapshot_path(sheet_id: str, worksheet: str, revision: str, unique_headers: bool = False) -> str:
+    rev = hashlib.sha1(str(revision).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(SNAPSHOT_DIR, _safe(sheet_id), f"{_prefix(worksheet, unique_headers)}{rev}.arrow")
+
+
+# ---------------- READ / WRITE ----------------
+def load_snapshot(sheet_id: str, worksheet: str, revision: str, unique_headers: bool = False):
+    """DataFrame from the local Arrow snapshot of this exact revision (memory-mapped), or None."""
+    path = snapshot_path(sheet_id, worksheet, revision, unique_headers)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = feather.read_table(path, memory_map=True)
+        meta = table.schema.metadata or {}
+        columns = json.loads(meta.get(b"columns", b"[]").decode("utf-8"))
+        df = table.to_pandas()
+        if len(columns) == len(df.columns):
+            df.columns = columns
+        return df
+    except Exception:
+        return None
+
+
+def save_snapshot(df: pd.DataFrame, sheet_id: str, worksheet: str, revision: str, unique_headers: bool = False):
+    """
+    Writes an uncompressed Arrow/Feather file (so it can be memory-mapped) and
+    removes older revisions of the same worksheet. Never raises.
+    """
+    path = snapshot_path(sheet_id, worksheet, revision, unique_headers)
+    folder = os.path.dirname(path)
+    try:
+        os.makedirs(folder, exist_ok=True)
+
+        # positional names: sheet headers may be duplicated / empty
+        arrays = [pa.array(df.iloc[:, i].astype(str).tolist(), type=pa.string()) for i in range(df.shape[1])]
+        names = [f"c{i}" for i in range(df.shape[1])]
+        table = pa.Table.from_arrays(
+            arrays, names=names,
+            metadata={"columns": json.dumps([str(c) for c in df.columns], ensure_ascii=False)},
+        )
+
+        tmp = f"{path}.tmp"
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, path)
+
+        prefix = _prefix(worksheet, unique_headers)
+        for fname in os.listdir(folder):
+            full = os.path.join(folder, fname)
+            if fname.startswith(prefix) and full != path:
+                os.remove(full)
+    except Exception:
+        pass
@@ -0,0 +1,166 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# ---------------- CONFIG ----------------
+# requests/second each free provider tolerates from one server IP (burst = same number)
+PROVIDER_RATES = {"google": 5.0, "mymemory": 2.0}
+DEFAULT_RATE = 1.0
+DEFAULT_WORKERS = 8
+MAX_WORKERS = 32
+
+
+# ---------------- RATE LIMIT ----------------
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests/second on average, bursts up to `burst`.
+    pause() empties the bucket for a while (all threads), e.g. after a rate-limit error.
+    """
+
+    def __init__(self, rate: float, burst: float = None, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.rate = float(rate)
+        self.burst = float(burst or max(1.0, rate))
+        self._tokens = self.burst
+        self._stamp = clock()
+        self._blocked_until = 0.0
+
+    def set_rate(self, rate: float, burst: float = None):
+        with self._lock:
+            self._refill(self._clock())
+            self.rate = float(rate)
+            self.burst = float(burst or max(1.0, rate))
+            self._tokens = min(self._tokens, self.burst)
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def acquire(self) -> float:
+        """Blocks until a token is available; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float):
+        with self._lock:
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._stamp = now
+
+
+@st.cache_resource(show_spinner=False)
+def _limiters() -> dict:
+    # one bucket per provider for the whole server: the provider limits our IP, not a session
+    return {"lock": threading.Lock(), "buckets": {}}
+
+
+def get_limiter(provider: str, rate: float = None) -> TokenBucket:
+    """Shared TokenBucket for a provider; passing `rate` updates it."""
+    reg = _limiters()
+    with reg["lock"]:
+        bucket = reg["buckets"].get(provider)
+        if bucket is None:
+            bucket = reg["buckets"][provider] = TokenBucket(rate or PROVIDER_RATES.get(provider, DEFAULT_RATE))
+        elif rate and rate != bucket.rate:
+            bucket.set_rate(rate)
+    return bucket
+
+
+# ---------------- WORKER POOL ----------------
+def _attach_context():
+    # lets st.cache_data-decorated helpers run inside the worker threads
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return None
+    return lambda: add_script_run_ctx(threading.current_thread(), ctx)
+
+
+def run_ordered(fn, items: list, workers: int = DEFAULT_WORKERS, progress=None) -> list:
+    """
+    fn(item) for every item on a thread pool; results come back in input order.
+    progress(done, total) is called from the calling thread as items finish.
+    Throughput is set by the rate limiters fn goes through, not by round-trip latency.
+    """
+    items = list(items)
+    total = len(items)
+    results = [None] * total
+    if not total:
+        return results
+    workers = max(1, min(int(workers), MAX_WORKERS, total))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate", initializer=_attach_context()) as pool:
+        futures = {pool.submit(fn, item): i for i, item in enumerate(items)}
+        for done, fut in enumerate(as_completed(futures), start=1):
+            results[futures[fut]] = fut.result()
+            if progress:
+                progress(done, total)
+    return results
+
+
+# ---------------- DEDUPLICATION ----------------
+# spelling variants that should hit the same translation
+_CHAR_MAP = str.maketrans({
+    "\u064a": "\u06cc", "\u0649": "\u06cc", "\u0643": "\u06a9", "\u0629": "\u0647",   # Arabic ي ى ك ة -> ی ک ه
+    "\u0640": None, "\u200e": None, "\u200f": None, "\ufeff": None,                      # tatweel, LRM/RLM, BOM
+})
+
+
+def normalize_series(s: pd.Series) -> pd.Series:
+    """NFKC, unified Arabic/Persian letter variants, no tatweel / bidi marks, collapsed whitespace."""
+    s = s.astype(str).str.normalize("NFKC").str.translate(_CHAR_MAP)
+    return s.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def dedup_translate(texts: pd.Series, fn=None, mask=None, workers: int = DEFAULT_WORKERS, progress=None,
+                    batch_fn=None):
+    """
+    Runs fn once per distinct normalized value of texts[mask] and maps the results
+    back to every row; rows outside mask are returned unchanged.
+    batch_fn(values, progress) -> list, if given, gets all distinct values in one call instead.
+
+    Returns (results: Series aligned with texts, info: dict with rows / to_translate / unique / saved).
+    """
+    texts = pd.Series(texts, dtype=object)
+    mask = np.ones(len(texts), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    keys = normalize_series(texts[mask])
+    codes, uniques = pd.factorize(keys)
+
+    if batch_fn is not None:
+        translated = list(batch_fn(list(uniques), progress))
+    else:
+        translated = run_ordered(fn, list(uniques), workers=workers, progress=progress)
+
+    mapped = np.empty(len(translated), dtype=object)
+    mapped[:] = translated
+    out = texts.copy()
+    out[mask] = mapped[codes]
+    to_translate = int(mask.sum())
+    info = {
+        "rows": len(texts),
+        "to_translate": to_translate,
+        "unique": len(uniques),
+        "saved": 1 - len(uniques) / to_translate if to_translate else 0.0,
+    }
+    return out, info
@@ -0,0 +1,178 @@
+"""
+Persistent translation memory (TM) shared by the translator pages and the
+Correction_Log flows.
+
+Entries are keyed by (normalized source text, engine, target language), where
+engine is "google", "mymemory", "openai:<model>" or "human" (reviewed
+translations imported from Translation_List / applied from Correction_Log).
+Storage is one SQLite file; recently used entries stay in an in-memory LRU.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from utils.translation import normalize_series
+
+# ---------------- CONFIG ----------------
+TM_PATH = os.environ.get(
+    "CBPAHA_TM_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "translation_memory.sqlite"),
+)
+HOT_SIZE = 50_000       # entries kept in the in-memory LRU
+QUERY_CHUNK = 500       # sources per SELECT ... IN (...)
+HUMAN = "human"         # reviewed translations win over any machine engine
+
+ARABIC_BLOCK_RE = re.compile("[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF]")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tm (
+    source      TEXT NOT NULL,
+    engine      TEXT NOT NULL,
+    target      TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    origin      TEXT,
+    updated     REAL NOT NULL,
+    PRIMARY KEY (source, engine, target)
+) WITHOUT ROWID
+"""
+
+
+def _normalize(texts) -> list:
+    return normalize_series(pd.Series(list(texts), dtype=object)).tolist()
+
+
+class TranslationMemory:
+    def __init__(self, path: str = TM_PATH, hot_size: int = HOT_SIZE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.hot_size = hot_size
+        self._lock = threading.Lock()
+        self._hot = OrderedDict()   # see _remember
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    # ---- hot tier ----
+    # (source, target) -> {engine: (translation, updated)} with every engine the DB has,
+    # so "not in the TM" is cached too
+    def _remember(self, key: tuple, entries: dict):
+        self._hot[key] = entries
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def _entries(self, sources: list, target: str) -> dict:
+        out, missing = {}, []
+        for src in sources:
+            key = (src, target)
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                out[src] = self._hot[key]
+            else:
+                missing.append(src)
+        for i in range(0, len(missing), QUERY_CHUNK):
+            chunk = missing[i:i + QUERY_CHUNK]
+            fetched = {src: {} for src in chunk}
+            rows = self._db.execute(
+                f"SELECT source, engine, translation, updated FROM tm "
+                f"WHERE target = ? AND source IN ({','.join('?' * len(chunk))})",
+                [target, *chunk],
+            )
+            for src, engine, translation, updated in rows:
+                fetched[src][engine] = (translation, updated)
+            for src, entries in fetched.items():
+                self._remember((src, target), entries)
+            out.update(fetched)
+        return out
+
+    # ---- lookups ----
+    def get(self, text: str, engines: list = None, target: str = "en"):
+        """Translation of `text` by the first engine in `engines` that has one, else None."""
+        return self.get_many([text], engines, target).get(_normalize([text])[0])
+
+    def get_many(self, texts, engines: list = None, target: str = "en") -> dict:
+        """
+        {normalized source: translation} for every text the TM knows.
+        engines=None -> any engine, reviewed ("human") first, then the most recent.
+        """
+        return self._resolve(list(dict.fromkeys(_normalize(texts))), engines, target)
+
+    def lookup(self, texts, engines: list = None, target: str = "en") -> list:
+        """Like get_many, but aligned with `texts` (None where the TM has nothing)."""
+        keys = _normalize(texts)
+        found = self._resolve(list(dict.fromkeys(keys)), engines, target)
+        return [found.get(k) for k in keys]
+
+    def _resolve(self, sources: list, engines: list, target: str) -> dict:
+        with self._lock:
+            entries = self._entries(sources, target)
+        found = {}
+        for src, by_engine in entries.items():
+            if engines:
+                hit = next((by_engine[e][0] for e in engines if e in by_engine), None)
+            elif by_engine:
+                hit = min(by_engine.items(), key=lambda kv: (kv[0] != HUMAN, -kv[1][1]))[1][0]
+            else:
+                hit = None
+            if hit is not None:
+                found[src] = hit
+        return found
+
+    # ---- writes ----
+    def put(self, text: str, engine: str, translation: str, target: str = "en", origin: str = None):
+        self.put_many([(text, translation)], engine, target, origin)
+
+    def put_many(self, pairs, engine: str, target: str = "en", origin: str = None) -> int:
+        """Stores (source, translation) pairs; empty or unchanged (untranslated) values are skipped."""
+        pairs = [(s, t) for s, t in pairs if str(s or "").strip() and str(t or "").strip()]
+        if not pairs:
+            return 0
+        sources = _normalize(s for s, _ in pairs)
+        now = time.time()
+        rows = [
+            (src, engine, target, str(t).strip(), origin, now)
+            for src, (_, t) in zip(sources, pairs)
+            if src != str(t).strip()
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO tm (source, engine, target, translation, origin, updated) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, engine, target) DO UPDATE SET "
+                "translation = excluded.translation, origin = excluded.origin, updated = excluded.updated",
+                rows,
+            )
+            self._db.commit()
+            for src, eng, tgt, t, _, updated in rows:
+                if (src, tgt) in self._hot:
+                    self._hot[(src, tgt)][eng] = (t, updated)
+        return len(rows)
+
+    def import_frame(self, df: pd.DataFrame, source_col: str, translation_col: str,
+                     engine: str = HUMAN, target: str = "en", origin: str = None) -> int:
+        """
+        Reviewed sheet (e.g. a filled-in Translation_List) -> TM. Only rows with an
+        Arabic-script source and a non-empty translation without Arabic script are taken.
+        """
+        src = df[source_col].fillna("").astype(str)
+        dst = df[translation_col].fillna("").astype(str).str.strip()
+        keep = src.str.contains(ARABIC_BLOCK_RE) & dst.ne("") & ~dst.str.contains(ARABIC_BLOCK_RE)
+        return self.put_many(zip(src[keep], dst[keep]), engine, target, origin)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT engine, COUNT(*) FROM tm GROUP BY engine").fetchall()
+            return {"entries": sum(n for _, n in rows), "by_engine": dict(rows), "hot": len(self._hot)}
+
+
+@st.cache_resource(show_spinner=False)
+def get_tm() -> TranslationMemory:
+    """One TM per server process; the SQLite file is shared by all processes."""
+    return TranslationMemory(TM_PATH)
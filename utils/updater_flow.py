@@ -0,0 +1,120 @@
+"""
+Shared flow of the updater pages (Dataset_Updater, Correction_Log Updater):
+detect Dari/Pashto cells in a worksheet, pre-fill reviewed translations and
+push the new (_uuid, Question, old_value) records with a resumable append.
+"""
+import uuid
+
+import streamlit as st
+from gspread.exceptions import APIError
+
+from utils.dedup import KEY_COLS, new_records, sync_hash_index
+from utils.detection import load_scan_state, save_scan_state, scan_persoarabic_incremental
+from utils.sheet_writes import AppendInProgress, append_rows_resumable, load_append_checkpoint, resume_append
+from utils.sheets import get_spreadsheet, get_version, invalidate, sheet_revision
+from utils.translation_memory import HUMAN, get_tm
+
+
+# ----------------- DETECTION -----------------
+@st.cache_data(show_spinner=False, max_entries=4)
+def _detect(sheet_id, name, version, revision, uuid_col, _df):
+    # only rows new/changed since the previous run are scanned; the rest comes from the saved state
+    state = load_scan_state(sheet_id, name)
+    found, state, scanned = scan_persoarabic_incremental(_df, uuid_col, state)
+    save_scan_state(sheet_id, name, state)
+    return found, scanned
+
+
+def detect_records(sheet_name: str, uuid_col: str, df):
+    """(records, rows scanned this run) for the Dari/Pashto cells of `df` (loaded from sheet_name)."""
+    return _detect(get_spreadsheet().id, sheet_name, get_version(sheet_name), sheet_revision(sheet_name), uuid_col, df)
+
+
+# ----------------- UPLOAD -----------------
+def upload_owner() -> str:
+    # append checkpoints are per session: other users' running uploads are never offered for resume
+    return st.session_state.setdefault("upload_owner", uuid.uuid4().hex)
+
+
+def upload(ws, sheet_name: str, fn, *args):
+    """Runs a chunked append with a progress bar; stops the page with a resume hint on failure."""
+    owner = upload_owner()
+    bar = st.progress(0.0)
+    try:
+        info = fn(*args, owner=owner, progress=lambda done, total: bar.progress(done / total))
+    except AppendInProgress as e:
+        st.warning(f"⏳ {e}. Try again once it has finished.")
+        st.stop()
+    except APIError as e:
+        pending = load_append_checkpoint(ws, owner) or {"done": 0, "total": 0}
+        st.error(
+            f"Upload stopped after {pending['done']:,} of {pending['total']:,} rows: {e}. "
+            "Use ▶️ Resume to continue from there."
+        )
+        st.stop()
+    # pick up our rows (and anyone else's) in the key index
+    sync_hash_index(ws)
+    invalidate(sheet_name)
+    return info
+
+
+def offer_resume(ws, sheet_name: str):
+    """Warns about this session's interrupted append to ws and resumes it on request."""
+    pending = load_append_checkpoint(ws, upload_owner())
+    if not pending:
+        return
+    st.warning(
+        f"An earlier upload to {sheet_name} was interrupted "
+        f"({pending['done']:,} of {pending['total']:,} rows sent)."
+    )
+    if st.button("▶️ Resume interrupted upload"):
+        info = upload(ws, sheet_name, resume_append, ws)
+        st.success(f"✅ Resumed: {info['rows']:,} remaining rows added in {info['requests']} requests.")
+        st.stop()
+
+
+# ----------------- TRANSLATION MEMORY -----------------
+def with_suggestions(ws, sheet_name: str, rows: list, columns: list = KEY_COLS):
+    """
+    Puts reviewed translations of old_value into the sheet's new_value column; returns (rows, hits).
+    Machine translations are never used here: Apply writes every non-empty new_value to Data_Set
+    and saves it back to the TM as reviewed.
+    """
+    header = ws.row_values(1)
+    if "new_value" not in header:
+        st.warning(f"{sheet_name} has no new_value column — nothing pre-filled.")
+        return rows, 0
+    pos = header.index("new_value")
+    src = columns.index("old_value")
+    known = get_tm().lookup([r[src] for r in rows], engines=[HUMAN])
+    out = []
+    for r, t in zip(rows, known):
+        if t is not None:
+            r = r + [""] * (pos - len(r)) + [t]
+        out.append(r)
+    return out, sum(t is not None for t in known)
+
+
+# ----------------- PUSH -----------------
+def push_new_records(ws, sheet_name: str, records, columns: list = KEY_COLS,
+                     rebuild_index: bool = False, prefill: bool = False):
+    """
+    Appends `columns` of the records whose key is not in ws yet; returns
+    (rows appended, append info, TM hits) or None when there was nothing new.
+    """
+    # Hash index of existing key rows; only rows added since the last run are fetched
+    index = sync_hash_index(ws, rebuild=rebuild_index)
+
+    to_add = new_records(records, index["hashes"])
+    if to_add.empty:
+        return None
+
+    to_add = to_add.sort_values("Question", kind="stable")
+    rows = to_add[columns].values.tolist()
+    suggested = 0
+    if prefill:
+        rows, suggested = with_suggestions(ws, sheet_name, rows, columns)
+
+    # appended in chunks after the last row (no next_row arithmetic → no overwrites between users)
+    info = upload(ws, sheet_name, append_rows_resumable, ws, rows)
+    return rows, info, suggested